@@ -0,0 +1,7 @@
+-- Clinic coordinates for the nearby-providers search
+USE ai_doctor_db;
+
+ALTER TABLE doctors
+    ADD COLUMN latitude DECIMAL(10, 8) AFTER pincode,
+    ADD COLUMN longitude DECIMAL(11, 8) AFTER latitude,
+    ADD INDEX idx_location (latitude, longitude);
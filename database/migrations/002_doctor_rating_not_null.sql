@@ -0,0 +1,7 @@
+-- Doctor listings page on (rating, id); a NOT NULL rating lets idx_rating supply that order
+USE ai_doctor_db;
+
+UPDATE doctors SET rating = 0.00 WHERE rating IS NULL;
+
+ALTER TABLE doctors
+    MODIFY COLUMN rating DECIMAL(3,2) NOT NULL DEFAULT 0.00;
@@ -37,13 +37,15 @@ CREATE TABLE doctors (
     phone VARCHAR(20),
     email VARCHAR(120),
     years_experience INT,
-    rating DECIMAL(3,2) DEFAULT 0.00,
+    rating DECIMAL(3,2) NOT NULL DEFAULT 0.00,
     consultation_fee DECIMAL(8,2),
     clinic_name VARCHAR(100),
     clinic_address TEXT,
     city VARCHAR(50),
     state VARCHAR(50),
     pincode VARCHAR(10),
+    latitude DECIMAL(10, 8),
+    longitude DECIMAL(11, 8),
     available_days VARCHAR(50),
     available_hours VARCHAR(50),
     languages_spoken VARCHAR(100),
@@ -51,7 +53,8 @@ CREATE TABLE doctors (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_specialty (specialty),
     INDEX idx_city (city),
-    INDEX idx_rating (rating)
+    INDEX idx_rating (rating),
+    INDEX idx_location (latitude, longitude)
 );
 
 -- Symptoms table
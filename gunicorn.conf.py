@@ -0,0 +1,42 @@
+"""
+Gunicorn configuration for the Flask API (wsgi:app)
+
+Symptom analysis is CPU-bound, so throughput comes from worker processes:
+one per core by default. Threads per worker cover the I/O-bound routes
+(database, LLM chat). Limits such as LLM_MAX_CONCURRENCY apply per worker.
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+# Load the app, knowledge base and in-memory indexes once in the master;
+# workers are forked from it and share those pages copy-on-write
+preload_app = True
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# Recycle workers now and then; replacements fork from the warm master
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+pidfile = os.getenv('GUNICORN_PIDFILE', 'gunicorn.pid')
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.getenv('GUNICORN_ERROR_LOG', '-')
+
+def pre_fork(server, worker):
+    # Keep the collector from touching (and so copying) preloaded objects
+    gc.freeze()
+
+def post_fork(server, worker):
+    # Each worker opens its own database connections
+    from app import app, db
+    with app.app_context():
+        db.engine.dispose()
@@ -0,0 +1,129 @@
+import { spawn, type ChildProcessWithoutNullStreams } from "child_process"
+import path from "path"
+import readline from "readline"
+
+// Resident pool of `medical-ai-service.py --serve` processes speaking newline-delimited JSON.
+// Each worker pays interpreter startup and MedicalAIService construction once.
+
+interface PendingRequest {
+  resolve: (value: any) => void
+  reject: (reason: Error) => void
+  timer: NodeJS.Timeout
+}
+
+class PythonWorker {
+  private process: ChildProcessWithoutNullStreams
+  private pending = new Map<number, PendingRequest>()
+  private nextId = 1
+  alive = true
+
+  constructor(scriptPath: string, pythonBin: string) {
+    this.process = spawn(pythonBin, [scriptPath, "--serve"], { stdio: ["pipe", "pipe", "pipe"] })
+
+    readline.createInterface({ input: this.process.stdout }).on("line", (line) => {
+      let message: any
+      try {
+        message = JSON.parse(line)
+      } catch {
+        console.error("Python worker sent invalid JSON:", line)
+        return
+      }
+
+      const request = this.pending.get(message.id)
+      if (!request) {
+        return
+      }
+
+      this.pending.delete(message.id)
+      clearTimeout(request.timer)
+      if (message.error) {
+        request.reject(new Error(message.error))
+      } else {
+        request.resolve(message.analysis)
+      }
+    })
+
+    this.process.stderr.on("data", (data) => {
+      console.error("Python worker error:", data.toString())
+    })
+
+    this.process.on("exit", (code) => this.fail(new Error(`Python worker exited with code ${code}`)))
+    this.process.on("error", (error) => this.fail(error))
+    this.process.stdin.on("error", (error) => this.fail(error))
+  }
+
+  private fail(error: Error) {
+    this.alive = false
+    for (const request of this.pending.values()) {
+      clearTimeout(request.timer)
+      request.reject(error)
+    }
+    this.pending.clear()
+  }
+
+  get load() {
+    return this.pending.size
+  }
+
+  send(payload: Record<string, unknown>, timeoutMs: number): Promise<any> {
+    const id = this.nextId++
+
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id)
+        reject(new Error("Python worker timed out"))
+      }, timeoutMs)
+
+      this.pending.set(id, { resolve, reject, timer })
+      this.process.stdin.write(JSON.stringify({ ...payload, id }) + "\n")
+    })
+  }
+
+  stop() {
+    this.process.kill()
+  }
+}
+
+export class PythonWorkerPool {
+  private workers: PythonWorker[] = []
+
+  constructor(
+    private scriptPath: string,
+    private size = 2,
+    private timeoutMs = 5000,
+    private pythonBin = "python3",
+  ) {}
+
+  private pickWorker() {
+    // Replace workers that died, then route to the least busy one
+    this.workers = this.workers.filter((worker) => worker.alive)
+    while (this.workers.length < this.size) {
+      this.workers.push(new PythonWorker(this.scriptPath, this.pythonBin))
+    }
+    return this.workers.reduce((best, worker) => (worker.load < best.load ? worker : best))
+  }
+
+  analyze(payload: Record<string, unknown>) {
+    return this.pickWorker().send(payload, this.timeoutMs)
+  }
+
+  stop() {
+    this.workers.forEach((worker) => worker.stop())
+    this.workers = []
+  }
+}
+
+// Keep a single pool per server process (survives module reloads in development)
+const globalForPool = globalThis as unknown as { pythonWorkerPool?: PythonWorkerPool }
+
+export function getPythonWorkerPool() {
+  if (!globalForPool.pythonWorkerPool) {
+    globalForPool.pythonWorkerPool = new PythonWorkerPool(
+      path.join(process.cwd(), "scripts", "medical-ai-service.py"),
+      Number(process.env.PYTHON_WORKERS || 2),
+      Number(process.env.PYTHON_WORKER_TIMEOUT_MS || 5000),
+      process.env.PYTHON_BIN || "python3",
+    )
+  }
+  return globalForPool.pythonWorkerPool
+}
@@ -3,10 +3,14 @@ Python-based medical AI service for advanced symptom analysis
 This can be called from the Next.js API routes for complex medical processing
 """
 
+import argparse
 import json
+import os
 import re
-from typing import Dict, List, Any
-from dataclasses import dataclass
+import socketserver
+import sys
+from typing import Dict, List, Any, IO
+from dataclasses import dataclass, asdict
 import requests
 
 @dataclass
@@ -18,61 +22,127 @@ class SymptomAnalysis:
     recommendations: List[str]
     red_flags: List[str]
 
-class MedicalAIService:
-    def __init__(self):
-        self.symptom_patterns = {
-            'fever': {
-                'keywords': ['fever', 'temperature', 'hot', 'chills', 'burning'],
-                'conditions': ['viral infection', 'bacterial infection', 'malaria', 'dengue'],
-                'severity_indicators': {
-                    'mild': ['low grade fever', 'slight temperature'],
-                    'moderate': ['fever', 'high temperature'],
-                    'severe': ['high fever', 'very hot', 'burning fever']
-                }
-            },
-            'respiratory': {
-                'keywords': ['cough', 'breathing', 'chest', 'lungs', 'shortness of breath'],
-                'conditions': ['respiratory infection', 'asthma', 'pneumonia', 'bronchitis'],
-                'severity_indicators': {
-                    'mild': ['dry cough', 'slight cough'],
-                    'moderate': ['persistent cough', 'chest discomfort'],
-                    'severe': ['difficulty breathing', 'severe chest pain', 'blood in cough']
-                }
-            },
-            'gastrointestinal': {
-                'keywords': ['stomach', 'nausea', 'vomiting', 'diarrhea', 'abdominal'],
-                'conditions': ['gastritis', 'food poisoning', 'gastroenteritis', 'appendicitis'],
-                'severity_indicators': {
-                    'mild': ['mild stomach ache', 'slight nausea'],
-                    'moderate': ['stomach pain', 'vomiting', 'diarrhea'],
-                    'severe': ['severe abdominal pain', 'blood in vomit', 'severe dehydration']
-                }
-            },
-            'neurological': {
-                'keywords': ['headache', 'dizziness', 'confusion', 'seizure', 'weakness'],
-                'conditions': ['tension headache', 'migraine', 'stroke', 'meningitis'],
-                'severity_indicators': {
-                    'mild': ['mild headache', 'slight dizziness'],
-                    'moderate': ['headache', 'dizziness', 'fatigue'],
-                    'severe': ['severe headache', 'confusion', 'loss of consciousness']
-                }
-            }
+SYMPTOM_PATTERNS = {
+    'fever': {
+        'keywords': ['fever', 'temperature', 'hot', 'chills', 'burning'],
+        'conditions': ['viral infection', 'bacterial infection', 'malaria', 'dengue'],
+        'severity_indicators': {
+            'mild': ['low grade fever', 'slight temperature'],
+            'moderate': ['fever', 'high temperature'],
+            'severe': ['high fever', 'very hot', 'burning fever']
         }
-        
-        self.emergency_keywords = [
-            'chest pain', 'difficulty breathing', 'unconscious', 'seizure',
-            'severe bleeding', 'stroke symptoms', 'heart attack', 'severe allergic reaction'
-        ]
-        
-        self.indian_health_context = {
-            'common_diseases': ['diabetes', 'hypertension', 'tuberculosis', 'malaria', 'dengue'],
-            'seasonal_concerns': {
-                'monsoon': ['dengue', 'malaria', 'typhoid', 'hepatitis'],
-                'summer': ['heat stroke', 'dehydration', 'food poisoning'],
-                'winter': ['respiratory infections', 'joint pain']
-            },
-            'nutritional_deficiencies': ['iron deficiency', 'vitamin D', 'vitamin B12']
+    },
+    'respiratory': {
+        'keywords': ['cough', 'breathing', 'chest', 'lungs', 'shortness of breath'],
+        'conditions': ['respiratory infection', 'asthma', 'pneumonia', 'bronchitis'],
+        'severity_indicators': {
+            'mild': ['dry cough', 'slight cough'],
+            'moderate': ['persistent cough', 'chest discomfort'],
+            'severe': ['difficulty breathing', 'severe chest pain', 'blood in cough']
+        }
+    },
+    'gastrointestinal': {
+        'keywords': ['stomach', 'nausea', 'vomiting', 'diarrhea', 'abdominal'],
+        'conditions': ['gastritis', 'food poisoning', 'gastroenteritis', 'appendicitis'],
+        'severity_indicators': {
+            'mild': ['mild stomach ache', 'slight nausea'],
+            'moderate': ['stomach pain', 'vomiting', 'diarrhea'],
+            'severe': ['severe abdominal pain', 'blood in vomit', 'severe dehydration']
+        }
+    },
+    'neurological': {
+        'keywords': ['headache', 'dizziness', 'confusion', 'seizure', 'weakness'],
+        'conditions': ['tension headache', 'migraine', 'stroke', 'meningitis'],
+        'severity_indicators': {
+            'mild': ['mild headache', 'slight dizziness'],
+            'moderate': ['headache', 'dizziness', 'fatigue'],
+            'severe': ['severe headache', 'confusion', 'loss of consciousness']
         }
+    }
+}
+
+EMERGENCY_KEYWORDS = [
+    'chest pain', 'difficulty breathing', 'unconscious', 'seizure',
+    'severe bleeding', 'stroke symptoms', 'heart attack', 'severe allergic reaction'
+]
+
+INDIAN_HEALTH_CONTEXT = {
+    'common_diseases': ['diabetes', 'hypertension', 'tuberculosis', 'malaria', 'dengue'],
+    'seasonal_concerns': {
+        'monsoon': ['dengue', 'malaria', 'typhoid', 'hepatitis'],
+        'summer': ['heat stroke', 'dehydration', 'food poisoning'],
+        'winter': ['respiratory infections', 'joint pain']
+    },
+    'nutritional_deficiencies': ['iron deficiency', 'vitamin D', 'vitamin B12']
+}
+
+BASE_RECOMMENDATIONS = {
+    'fever': (
+        "Rest and stay hydrated",
+        "Take paracetamol for fever reduction",
+        "Use cooling measures like cold compress",
+        "Monitor temperature regularly"
+    ),
+    'respiratory': (
+        "Rest and avoid exertion",
+        "Stay hydrated with warm fluids",
+        "Use steam inhalation",
+        "Avoid smoking and pollutants"
+    ),
+    'gastrointestinal': (
+        "Stay hydrated with ORS",
+        "Eat bland, easy-to-digest foods",
+        "Avoid dairy and spicy foods",
+        "Rest and monitor symptoms"
+    ),
+    'neurological': (
+        "Rest in a quiet, dark room",
+        "Stay hydrated",
+        "Apply cold compress to head",
+        "Avoid bright lights and loud sounds"
+    )
+}
+
+DEFAULT_RECOMMENDATIONS = (
+    "Rest and monitor symptoms",
+    "Stay hydrated",
+    "Maintain good hygiene"
+)
+
+RED_FLAG_PATTERNS = {
+    'high fever': ['fever above 104', 'very high fever', 'burning fever'],
+    'breathing difficulty': ['can\'t breathe', 'gasping', 'choking'],
+    'severe pain': ['unbearable pain', 'excruciating', 'worst pain'],
+    'neurological': ['confusion', 'loss of consciousness', 'seizure'],
+    'bleeding': ['bleeding', 'blood in', 'hemorrhage']
+}
+
+MEDICINE_DB = {
+    'fever': [
+        {'name': 'Paracetamol', 'dosage': '500mg every 6 hours', 'prescription': False},
+        {'name': 'Ibuprofen', 'dosage': '400mg every 8 hours', 'prescription': False}
+    ],
+    'cough': [
+        {'name': 'Honey', 'dosage': '1 tsp as needed', 'prescription': False},
+        {'name': 'Cough syrup', 'dosage': 'As per label', 'prescription': False}
+    ],
+    'headache': [
+        {'name': 'Paracetamol', 'dosage': '500mg as needed', 'prescription': False},
+        {'name': 'Rest', 'dosage': 'Adequate sleep', 'prescription': False}
+    ]
+}
+
+# Derived once at import instead of on every analysis
+PRIMARY_CONDITIONS = {
+    category: data['conditions'][0] if data['conditions'] else "General health concern"
+    for category, data in SYMPTOM_PATTERNS.items()
+}
+
+class MedicalAIService:
+    def __init__(self):
+        self.symptom_patterns = SYMPTOM_PATTERNS
+        self.emergency_keywords = EMERGENCY_KEYWORDS
+        self.indian_health_context = INDIAN_HEALTH_CONTEXT
 
     def analyze_symptoms(self, symptoms_text: str, patient_context: Dict = None) -> SymptomAnalysis:
         """
@@ -115,8 +185,7 @@ class MedicalAIService:
         urgency = self._assess_urgency(severity, symptoms_lower)
         
         # Get possible conditions
-        conditions = self.symptom_patterns[primary_category]['conditions']
-        primary_condition = conditions[0] if conditions else "General health concern"
+        primary_condition = PRIMARY_CONDITIONS[primary_category]
         
         return SymptomAnalysis(
             condition=primary_condition,
@@ -152,38 +221,7 @@ class MedicalAIService:
 
     def _generate_recommendations(self, category: str, severity: str) -> List[str]:
         """Generate category-specific recommendations"""
-        base_recommendations = {
-            'fever': [
-                "Rest and stay hydrated",
-                "Take paracetamol for fever reduction",
-                "Use cooling measures like cold compress",
-                "Monitor temperature regularly"
-            ],
-            'respiratory': [
-                "Rest and avoid exertion",
-                "Stay hydrated with warm fluids",
-                "Use steam inhalation",
-                "Avoid smoking and pollutants"
-            ],
-            'gastrointestinal': [
-                "Stay hydrated with ORS",
-                "Eat bland, easy-to-digest foods",
-                "Avoid dairy and spicy foods",
-                "Rest and monitor symptoms"
-            ],
-            'neurological': [
-                "Rest in a quiet, dark room",
-                "Stay hydrated",
-                "Apply cold compress to head",
-                "Avoid bright lights and loud sounds"
-            ]
-        }
-        
-        recommendations = base_recommendations.get(category, [
-            "Rest and monitor symptoms",
-            "Stay hydrated",
-            "Maintain good hygiene"
-        ])
+        recommendations = list(BASE_RECOMMENDATIONS.get(category, DEFAULT_RECOMMENDATIONS))
         
         if severity == 'severe':
             recommendations.insert(0, "Seek medical attention promptly")
@@ -194,15 +232,7 @@ class MedicalAIService:
         """Identify concerning symptoms that require medical attention"""
         red_flags = []
         
-        red_flag_patterns = {
-            'high fever': ['fever above 104', 'very high fever', 'burning fever'],
-            'breathing difficulty': ['can\'t breathe', 'gasping', 'choking'],
-            'severe pain': ['unbearable pain', 'excruciating', 'worst pain'],
-            'neurological': ['confusion', 'loss of consciousness', 'seizure'],
-            'bleeding': ['bleeding', 'blood in', 'hemorrhage']
-        }
-        
-        for flag, patterns in red_flag_patterns.items():
+        for flag, patterns in RED_FLAG_PATTERNS.items():
             if any(pattern in symptoms for pattern in patterns):
                 red_flags.append(flag)
         
@@ -225,27 +255,73 @@ class MedicalAIService:
 
     def get_medicine_suggestions(self, condition: str) -> List[Dict]:
         """Get medicine suggestions based on condition"""
-        medicine_db = {
-            'fever': [
-                {'name': 'Paracetamol', 'dosage': '500mg every 6 hours', 'prescription': False},
-                {'name': 'Ibuprofen', 'dosage': '400mg every 8 hours', 'prescription': False}
-            ],
-            'cough': [
-                {'name': 'Honey', 'dosage': '1 tsp as needed', 'prescription': False},
-                {'name': 'Cough syrup', 'dosage': 'As per label', 'prescription': False}
-            ],
-            'headache': [
-                {'name': 'Paracetamol', 'dosage': '500mg as needed', 'prescription': False},
-                {'name': 'Rest', 'dosage': 'Adequate sleep', 'prescription': False}
-            ]
-        }
+        return [dict(medicine) for medicine in MEDICINE_DB.get(condition.lower(), [])]
+
+def handle_request(service: MedicalAIService, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer one {"id", "symptoms", "patientContext"} request"""
+    request_id = payload.get('id')
+    symptoms = payload.get('symptoms')
+    
+    if not symptoms or not isinstance(symptoms, str):
+        return {'id': request_id, 'error': 'Symptoms are required'}
+    
+    analysis = service.analyze_symptoms(symptoms, payload.get('patientContext'))
+    return {'id': request_id, 'analysis': asdict(analysis)}
+
+def serve_lines(service: MedicalAIService, reader: IO[str], writer: IO[str]) -> None:
+    """Answer newline-delimited JSON requests until the input closes"""
+    for line in reader:
+        line = line.strip()
+        if not line:
+            continue
+        
+        # Echo the caller's id on every reply it can be read from
+        request_id = None
+        try:
+            payload = json.loads(line)
+            if not isinstance(payload, dict):
+                raise ValueError('expected a JSON object')
+            request_id = payload.get('id')
+            response = handle_request(service, payload)
+        except ValueError as e:
+            response = {'id': request_id, 'error': f'Invalid request: {e}'}
+        except Exception as e:
+            response = {'id': request_id, 'error': f'Analysis failed: {e}'}
         
-        return medicine_db.get(condition.lower(), [])
+        writer.write(json.dumps(response) + '\n')
+        writer.flush()
 
-def main():
-    """Example usage of the Medical AI Service"""
-    service = MedicalAIService()
+def serve_socket(service: MedicalAIService, socket_path: str) -> None:
+    """Serve newline-delimited JSON over a local Unix socket"""
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            reader = (line.decode('utf-8') for line in self.rfile)
+            writer = _SocketWriter(self.wfile)
+            serve_lines(service, reader, writer)
     
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    
+    with socketserver.ThreadingUnixStreamServer(socket_path, RequestHandler) as server:
+        server.daemon_threads = True
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
+
+class _SocketWriter:
+    """Text adapter over a socket's binary write file"""
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text: str) -> None:
+        self.wfile.write(text.encode('utf-8'))
+
+    def flush(self) -> None:
+        self.wfile.flush()
+
+def run_examples(service: MedicalAIService) -> None:
+    """Example usage of the Medical AI Service"""
     # Test cases
     test_symptoms = [
         "I have fever and headache for 2 days",
@@ -265,5 +341,30 @@ def main():
             print(f"Red Flags: {', '.join(analysis.red_flags)}")
         print("-" * 50)
 
+def main():
+    """Run as a resident worker, a one-shot stdin filter, or the examples"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--serve', action='store_true',
+                        help='stay resident and answer newline-delimited JSON on stdin/stdout')
+    parser.add_argument('--socket', metavar='PATH',
+                        help='stay resident and answer newline-delimited JSON on a Unix socket')
+    args = parser.parse_args()
+    
+    service = MedicalAIService()
+    
+    if args.socket:
+        serve_socket(service, args.socket)
+    elif args.serve:
+        serve_lines(service, sys.stdin, sys.stdout)
+    elif not sys.stdin.isatty():
+        # One-shot mode: a single JSON request on stdin, the analysis on stdout
+        response = handle_request(service, json.load(sys.stdin))
+        if 'error' in response:
+            print(response['error'], file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(response['analysis']))
+    else:
+        run_examples(service)
+
 if __name__ == "__main__":
     main()
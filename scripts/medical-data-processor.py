@@ -5,22 +5,424 @@ Handles complex medical calculations, drug interactions, and health risk assessm
 
 import pandas as pd
 import numpy as np
+import argparse
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from functools import lru_cache
+import io
+from itertools import islice
 import json
+import multiprocessing
+import os
+import random
+import re
 import sqlite3
-from typing import Dict, List, Tuple, Optional
+import sys
+import tempfile
+import threading
+import time
+from typing import IO, Dict, FrozenSet, Iterable, Iterator, List, Sequence, Tuple, Optional
+
+# Brand and alternate names mapped to the generic name used in drug_interactions
+DRUG_ALIASES = {
+    'acetaminophen': 'paracetamol',
+    'tylenol': 'paracetamol',
+    'crocin': 'paracetamol',
+    'calpol': 'paracetamol',
+    'dolo 650': 'paracetamol',
+    'acetylsalicylic acid': 'aspirin',
+    'disprin': 'aspirin',
+    'ecosprin': 'aspirin',
+    'coumadin': 'warfarin',
+    'glycomet': 'metformin',
+    'glucophage': 'metformin',
+    'advil': 'ibuprofen',
+    'motrin': 'ibuprofen',
+    'brufen': 'ibuprofen',
+    'lanoxin': 'digoxin',
+    'ethanol': 'alcohol',
+    'ace inhibitor': 'ace inhibitors',
+    'diuretic': 'diuretics',
+}
+
+DOSAGE_PATTERN = re.compile(r'\s*\d+(?:\.\d+)?\s*(?:mg|mcg|g|ml|iu|%)(?:\s.*)?$')
+
+# Defaults used by calculate_health_risk_score when a field is missing
+RISK_INPUT_DEFAULTS = {
+    'age': 30,
+    'bmi': 25,
+    'bp_systolic': 120,
+    'bp_diastolic': 80,
+    'cholesterol': 200,
+    'smoking': False,
+    'diabetes': False,
+    'family_history': 0
+}
+
+RISK_LEVELS = ["Low", "Moderate", "High", "Very High"]
+
+RISK_COMPONENT_COLUMNS = ['age_risk', 'bmi_risk', 'blood_pressure_risk', 'cholesterol_risk',
+                          'lifestyle_risk', 'family_history_risk']
+
+# Largest IN (...) list per query
+QUERY_BATCH_SIZE = 500
+
+# Columns accepted by bulk ingestion: required text, numeric (required ones listed first), optional text
+INGEST_SCHEMAS = {
+    'health_metrics': {
+        'columns': ['patient_id', 'metric_type', 'value', 'unit', 'date_recorded',
+                    'normal_range_min', 'normal_range_max'],
+        'required': ['patient_id', 'metric_type'],
+        'numeric': ['value', 'normal_range_min', 'normal_range_max'],
+        'required_numeric': ['value']
+    },
+    'patient_history': {
+        'columns': ['patient_id', 'symptoms', 'diagnosis', 'medications', 'date_recorded', 'severity_score'],
+        'required': ['patient_id', 'symptoms'],
+        'numeric': ['severity_score'],
+        'required_numeric': []
+    }
+}
+
+def round_like_python(values: np.ndarray, digits: int = 2) -> np.ndarray:
+    """np.round, corrected to match builtin round() on values near a rounding tie"""
+    rounded = np.round(values, digits)
+    scaled = values * 10 ** digits
+    # Elsewhere rint(x * 10**d) / 10**d is exactly what round() returns
+    near_tie = np.flatnonzero(np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6)
+    if len(near_tie):
+        rounded[near_tie] = [round(value, digits) for value in values[near_tie].tolist()]
+    return rounded
+
+def id_batches(ids: Optional[Sequence[str]], size: int = QUERY_BATCH_SIZE) -> Iterator[Optional[Sequence[str]]]:
+    """Split ids into IN (...) sized batches; None means no filter"""
+    if ids is None:
+        yield None
+        return
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+@lru_cache(maxsize=65536)
+def normalize_drug_name(name: str) -> str:
+    """Canonical lowercase generic name for a medication string"""
+    key = ' '.join(str(name).lower().replace('-', ' ').split())
+    key = DOSAGE_PATTERN.sub('', key) or key
+    return DRUG_ALIASES.get(key, key)
+
+class ConnectionManager:
+    """Per-thread SQLite connections reused across calls"""
+
+    def __init__(self, db_path: str, cache_size_kb: int = 64 * 1024,
+                 mmap_size: int = 256 * 1024 * 1024, busy_timeout_ms: int = 5000,
+                 cached_statements: int = 256):
+        self.db_path = db_path
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections: List[sqlite3.Connection] = []
+        self.pid = os.getpid()
+
+    def open(self) -> sqlite3.Connection:
+        """Open a connection with WAL journaling and tuned pragmas"""
+        # Autocommit mode: reads never hold a transaction open, writes go through transaction()
+        conn = sqlite3.connect(self.db_path, isolation_level=None,
+                               cached_statements=self.cached_statements,
+                               check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        if os.getpid() != self.pid:
+            # Connections must not cross fork(); children start with a clean slate
+            self.local = threading.local()
+            self.connections = []
+            self.lock = threading.Lock()
+            self.pid = os.getpid()
+
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.open()
+            self.local.conn = conn
+            self.local.depth = 0
+            with self.lock:
+                self.connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block in one transaction; nested blocks join the outer one"""
+        conn = self.connection()
+        if self.local.depth:
+            self.local.depth += 1
+            try:
+                yield conn
+            finally:
+                self.local.depth -= 1
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        self.local.depth = 1
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+        finally:
+            self.local.depth = 0
+
+    def close(self):
+        """Close every connection opened by this process"""
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for conn in connections:
+            conn.close()
+        self.local = threading.local()
+
+class DrugInteractionIndex:
+    """In-memory adjacency index over the drug_interactions table"""
+
+    def __init__(self, max_staleness: float = 1.0):
+        self.max_staleness = max_staleness
+        self.neighbors: Dict[str, FrozenSet[str]] = {}
+        self.pairs: Dict[Tuple[str, str], Dict] = {}
+        self.last_id = 0
+        self.row_count = 0
+        self.writes = None
+        self.rewrites = None
+        self.checked_at = float('-inf')
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def pair_key(drug1: str, drug2: str) -> Tuple[str, str]:
+        """Order-independent key for a pair of canonical names"""
+        return (drug1, drug2) if drug1 <= drug2 else (drug2, drug1)
+
+    def add_rows(self, rows: Iterable[Tuple], pairs: Dict, neighbors: Dict):
+        """Merge (id, drug1, drug2, type, severity, description) rows, keeping the first per pair"""
+        for row_id, drug1, drug2, interaction_type, severity, description in rows:
+            a, b = normalize_drug_name(drug1), normalize_drug_name(drug2)
+            key = self.pair_key(a, b)
+            if a == b or key in pairs:
+                continue
+            pairs[key] = {
+                'drug1': drug1,
+                'drug2': drug2,
+                'interaction_type': interaction_type,
+                'severity': severity,
+                'description': description
+            }
+            # Replace rather than mutate so concurrent readers never see a set change size
+            neighbors[a] = neighbors.get(a, frozenset()) | {b}
+            neighbors[b] = neighbors.get(b, frozenset()) | {a}
+
+    @staticmethod
+    def change_counters(conn: sqlite3.Connection) -> Tuple[int, int]:
+        """(writes, rewrites) as kept by the drug_interactions triggers"""
+        return conn.execute('SELECT writes, rewrites FROM drug_interaction_changes').fetchone()
+
+    def rebuild(self, conn: sqlite3.Connection):
+        """Load the whole table into fresh structures and swap them in"""
+        with self.lock:
+            # Counters first: a write landing before the SELECT just triggers another refresh
+            writes, rewrites = self.change_counters(conn)
+            rows = conn.execute('''
+                SELECT id, drug1, drug2, interaction_type, severity, description
+                FROM drug_interactions ORDER BY id
+            ''').fetchall()
+            pairs: Dict[Tuple[str, str], Dict] = {}
+            neighbors: Dict[str, FrozenSet[str]] = {}
+            self.add_rows(rows, pairs, neighbors)
+            self.pairs, self.neighbors = pairs, neighbors
+            self.last_id = rows[-1][0] if rows else 0
+            self.row_count = len(rows)
+            self.writes, self.rewrites = writes, rewrites
+            self.checked_at = time.monotonic()
+
+    def refresh(self, conn: sqlite3.Connection):
+        """Pick up appended rows; rebuild after any UPDATE, DELETE or insert below the last id"""
+        writes, rewrites = self.change_counters(conn)
+        if rewrites != self.rewrites:
+            self.rebuild(conn)
+            return
+
+        with self.lock:
+            appended = True
+            if writes != self.writes:
+                rows = conn.execute('''
+                    SELECT id, drug1, drug2, interaction_type, severity, description
+                    FROM drug_interactions WHERE id > ? ORDER BY id
+                ''', (self.last_id,)).fetchall()
+                # Every write since the last refresh must be one of these appended rows
+                appended = len(rows) == writes - self.writes
+                if appended:
+                    self.add_rows(rows, self.pairs, self.neighbors)
+                    self.last_id = rows[-1][0] if rows else self.last_id
+                    self.row_count += len(rows)
+                    self.writes = writes
+            self.checked_at = time.monotonic()
+        if not appended:
+            self.rebuild(conn)
+
+    def ensure_fresh(self, conn: sqlite3.Connection):
+        """Refresh at most once per max_staleness seconds"""
+        if time.monotonic() - self.checked_at >= self.max_staleness:
+            self.refresh(conn)
+
+    def check(self, medications: Sequence[str]) -> List[Dict]:
+        """Interactions among one medication list, in input pair order"""
+        positions: Dict[str, int] = {}
+        for med in medications:
+            positions.setdefault(normalize_drug_name(med), len(positions))
+
+        found = []
+        neighbors, pairs = self.neighbors, self.pairs
+        for name, i in positions.items():
+            partners = neighbors.get(name)
+            if partners:
+                # Set intersection runs in C and is almost always empty
+                for other in partners.intersection(positions):
+                    j = positions[other]
+                    if j > i:
+                        found.append((i, j))
+
+        if not found:
+            return []
+
+        names = list(positions)
+        found.sort()
+        return [dict(pairs[self.pair_key(names[i], names[j])]) for i, j in found]
+
+    def check_many(self, medication_lists: Iterable[Sequence[str]]) -> List[List[Dict]]:
+        """Interactions for many medication lists against the same snapshot"""
+        return [self.check(medications) for medications in medication_lists]
+
+    def stats(self) -> Dict:
+        return {
+            'drugs': len(self.neighbors),
+            'pairs': len(self.pairs),
+            'rows': self.row_count,
+            'last_id': self.last_id,
+            'writes': self.writes,
+            'rewrites': self.rewrites
+        }
+
+class SymptomPatternAccumulator:
+    """Per-patient symptom counts and severity regression sums folded in chunk by chunk"""
+
+    STAT_COLUMNS = ['episodes', 'n', 'sum_t', 'sum_tt', 'sum_y', 'sum_ty']
+
+    def __init__(self):
+        self.stats = pd.DataFrame(columns=self.STAT_COLUMNS, dtype=float)
+        self.symptom_counts: Optional[pd.Series] = None
+
+    def add_chunk(self, chunk: pd.DataFrame):
+        """Fold rows of (patient_id, symptoms, severity_score, t) into the running totals"""
+        if chunk.empty:
+            return
+
+        # Least-squares sufficient statistics for severity against time (t in days)
+        y = chunk['severity_score'].astype(float)
+        t = chunk['t'].astype(float)
+        valid = y.notna() & t.notna()
+        frame = pd.DataFrame({
+            'patient_id': chunk['patient_id'],
+            'episodes': 1.0,
+            'n': valid.astype(float),
+            'sum_t': t.where(valid, 0.0),
+            'sum_tt': (t * t).where(valid, 0.0),
+            'sum_y': y.where(valid, 0.0),
+            'sum_ty': (t * y).where(valid, 0.0)
+        })
+        self.stats = self.stats.add(frame.groupby('patient_id').sum(), fill_value=0)
+
+        tokens = (
+            chunk[['patient_id']]
+            .assign(symptom=chunk['symptoms'].fillna('').str.split(','))
+            .explode('symptom')
+        )
+        tokens['symptom'] = tokens['symptom'].str.strip().str.lower()
+        tokens = tokens[tokens['symptom'] != '']
+        counts = tokens.groupby(['patient_id', 'symptom']).size()
+        if self.symptom_counts is None:
+            self.symptom_counts = counts.astype(float)
+        else:
+            self.symptom_counts = self.symptom_counts.add(counts, fill_value=0)
+
+    def results(self, days: int, top_n: int = 5) -> Dict[str, Dict]:
+        """Summaries keyed by patient id, in the shape of analyze_symptom_patterns"""
+        summaries = {}
+        if self.stats.empty:
+            return summaries
+
+        top_symptoms: Dict[str, List[Tuple[str, int]]] = {}
+        if self.symptom_counts is not None and not self.symptom_counts.empty:
+            counts = self.symptom_counts.rename('count').reset_index()
+            counts.columns = ['patient_id', 'symptom', 'count']
+            # Highest count first; ties broken alphabetically so chunking never changes the order
+            counts = counts.sort_values(['patient_id', 'count', 'symptom'], ascending=[True, False, True])
+            counts = counts.groupby('patient_id', sort=False).head(top_n)
+            for patient_id, symptom, count in counts.itertuples(index=False):
+                top_symptoms.setdefault(patient_id, []).append((symptom, int(count)))
+
+        stats = self.stats
+        n = stats['n'].to_numpy()
+        denominator = n * stats['sum_tt'].to_numpy() - stats['sum_t'].to_numpy() ** 2
+        numerator = n * stats['sum_ty'].to_numpy() - stats['sum_t'].to_numpy() * stats['sum_y'].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slopes = np.where((n > 1) & (np.abs(denominator) > 1e-12), numerator / denominator, 0.0)
+            averages = stats['sum_y'].to_numpy() / n
+
+        for patient_id, episodes, average, slope in zip(stats.index, stats['episodes'].to_numpy(),
+                                                        averages, slopes):
+            severity_trend = "stable"
+            if slope < -1e-9:
+                severity_trend = "improving"
+            elif slope > 1e-9:
+                severity_trend = "worsening"
+
+            summaries[patient_id] = {
+                # Pre-round so floating sums from different chunkings give the same answer
+                'average_severity': round(round(float(average), 9), 2) if np.isfinite(average) else None,
+                'most_common_symptoms': top_symptoms.get(patient_id, []),
+                'severity_trend': severity_trend,
+                'severity_slope_per_day': round(float(slope), 4),
+                'total_episodes': int(episodes),
+                'analysis_period_days': days
+            }
+        return summaries
 
 class MedicalDataProcessor:
     def __init__(self, db_path: str = "medical_data.db"):
         self.db_path = db_path
+        self.db = ConnectionManager(db_path)
+        self.interaction_index = DrugInteractionIndex()
         self.init_database()
         
+    def close(self):
+        """Release pooled database connections"""
+        self.db.close()
+        
     def init_database(self):
         """Initialize SQLite database for medical data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.db.transaction() as conn:
+            self.create_tables(conn.cursor())
         
-        # Create tables for medical data
+        # Seed with sample drug interaction data
+        self.seed_drug_interactions()
+    
+    def create_tables(self, cursor: sqlite3.Cursor):
+        """Create tables for medical data"""
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS patient_history (
                 id INTEGER PRIMARY KEY,
@@ -57,11 +459,171 @@ class MedicalDataProcessor:
             )
         ''')
         
-        conn.commit()
-        conn.close()
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_drug_interactions_pair
+            ON drug_interactions (drug1, drug2)
+        ''')
         
-        # Seed with sample drug interaction data
-        self.seed_drug_interactions()
+        self.create_interaction_change_counters(cursor)
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_health_metrics_patient_date
+            ON health_metrics (patient_id, date_recorded)
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+                source TEXT,
+                target TEXT,
+                byte_offset INTEGER,
+                rows_read INTEGER,
+                rows_written INTEGER,
+                rows_rejected INTEGER,
+                updated_at TIMESTAMP,
+                PRIMARY KEY (source, target)
+            )
+        ''')
+        
+        self.create_metric_rollups(cursor)
+    
+    def create_interaction_change_counters(self, cursor: sqlite3.Cursor):
+        """Trigger-maintained write counters that DrugInteractionIndex polls for changes"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS drug_interaction_changes (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                writes INTEGER NOT NULL DEFAULT 0,
+                rewrites INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO drug_interaction_changes (id, writes, rewrites) VALUES (1, 0, 0)")
+        
+        # Every row written counts as a write; updates and deletes also count as rewrites
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS drug_interaction_changes_insert
+            AFTER INSERT ON drug_interactions
+            BEGIN
+                UPDATE drug_interaction_changes SET writes = writes + 1 WHERE id = 1;
+            END
+        ''')
+        for event in ('UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS drug_interaction_changes_{event.lower()}
+                AFTER {event} ON drug_interactions
+                BEGIN
+                    UPDATE drug_interaction_changes SET writes = writes + 1, rewrites = rewrites + 1 WHERE id = 1;
+                END
+            ''')
+    
+    def create_metric_rollups(self, cursor: sqlite3.Cursor):
+        """Daily per-patient, per-metric aggregates of health_metrics kept current by triggers"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'health_metrics_daily'"
+        ).fetchone()
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS health_metrics_daily (
+                patient_id TEXT NOT NULL,
+                metric_type TEXT NOT NULL,
+                day TEXT NOT NULL,
+                total REAL,
+                value_count INTEGER,
+                readings INTEGER,
+                min_value REAL,
+                max_value REAL,
+                unit TEXT,
+                normal_range_min REAL,
+                normal_range_max REAL,
+                PRIMARY KEY (patient_id, metric_type, day)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Bulk loads set deferred inside their own transaction and merge whole chunks instead
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rollup_control (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                deferred INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO rollup_control (id, deferred) VALUES (1, 0)")
+        
+        # Inserts fold straight into their bucket
+        cursor.execute("DROP TRIGGER IF EXISTS health_metrics_daily_insert")
+        cursor.execute('''
+            CREATE TRIGGER health_metrics_daily_insert
+            AFTER INSERT ON health_metrics
+            WHEN NEW.patient_id IS NOT NULL AND NEW.metric_type IS NOT NULL
+                 AND date(NEW.date_recorded) IS NOT NULL
+                 AND NOT (SELECT deferred FROM rollup_control WHERE id = 1)
+            BEGIN
+                INSERT INTO health_metrics_daily
+                    (patient_id, metric_type, day, total, value_count, readings,
+                     min_value, max_value, unit, normal_range_min, normal_range_max)
+                VALUES (NEW.patient_id, NEW.metric_type, date(NEW.date_recorded),
+                        COALESCE(NEW.value, 0), NEW.value IS NOT NULL, 1, NEW.value, NEW.value,
+                        NEW.unit, NEW.normal_range_min, NEW.normal_range_max)
+                ON CONFLICT (patient_id, metric_type, day) DO UPDATE SET
+                    total = total + excluded.total,
+                    value_count = value_count + excluded.value_count,
+                    readings = readings + 1,
+                    min_value = COALESCE(MIN(min_value, excluded.min_value), min_value, excluded.min_value),
+                    max_value = COALESCE(MAX(max_value, excluded.max_value), max_value, excluded.max_value),
+                    unit = excluded.unit,
+                    normal_range_min = excluded.normal_range_min,
+                    normal_range_max = excluded.normal_range_max;
+            END
+        ''')
+        
+        # Min/max cannot be undone incrementally, so deletes and updates rebuild the affected day
+        for event, row in (('DELETE', 'OLD'), ('UPDATE', 'OLD'), ('UPDATE', 'NEW')):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS health_metrics_daily_{event.lower()}_{row.lower()}
+                AFTER {event} ON health_metrics
+                WHEN date({row}.date_recorded) IS NOT NULL
+                BEGIN
+                    DELETE FROM health_metrics_daily
+                    WHERE patient_id = {row}.patient_id AND metric_type = {row}.metric_type
+                      AND day = date({row}.date_recorded);
+                    INSERT INTO health_metrics_daily
+                        (patient_id, metric_type, day, total, value_count, readings,
+                         min_value, max_value, unit, normal_range_min, normal_range_max)
+                    SELECT patient_id, metric_type, date({row}.date_recorded),
+                           TOTAL(value), COUNT(value), COUNT(*), MIN(value), MAX(value),
+                           unit, normal_range_min, normal_range_max
+                    FROM health_metrics
+                    WHERE patient_id = {row}.patient_id AND metric_type = {row}.metric_type
+                      AND date_recorded >= date({row}.date_recorded)
+                      AND date_recorded < date({row}.date_recorded, '+1 day')
+                    GROUP BY patient_id, metric_type;
+                END
+            ''')
+        
+        if not exists:
+            # Backfill buckets for readings recorded before the rollup existed
+            self.merge_metric_rollups(cursor, 0)
+    
+    def merge_metric_rollups(self, cursor: sqlite3.Cursor, after_id: int):
+        """Fold health_metrics rows with id > after_id into the daily rollup in one statement"""
+        cursor.execute('''
+            INSERT INTO health_metrics_daily
+                (patient_id, metric_type, day, total, value_count, readings,
+                 min_value, max_value, unit, normal_range_min, normal_range_max)
+            SELECT patient_id, metric_type, date(date_recorded),
+                   TOTAL(value), COUNT(value), COUNT(*), MIN(value), MAX(value),
+                   unit, normal_range_min, normal_range_max
+            FROM health_metrics
+            WHERE id > ? AND patient_id IS NOT NULL AND metric_type IS NOT NULL
+              AND date(date_recorded) IS NOT NULL
+            GROUP BY patient_id, metric_type, date(date_recorded)
+            ON CONFLICT (patient_id, metric_type, day) DO UPDATE SET
+                total = total + excluded.total,
+                value_count = value_count + excluded.value_count,
+                readings = readings + excluded.readings,
+                min_value = COALESCE(MIN(min_value, excluded.min_value), min_value, excluded.min_value),
+                max_value = COALESCE(MAX(max_value, excluded.max_value), max_value, excluded.max_value),
+                unit = excluded.unit,
+                normal_range_min = excluded.normal_range_min,
+                normal_range_max = excluded.normal_range_max
+        ''', (after_id,))
     
     def seed_drug_interactions(self):
         """Seed database with common drug interactions"""
@@ -73,18 +635,17 @@ class MedicalDataProcessor:
             ("Digoxin", "Diuretics", "Electrolyte", "High", "Digitalis toxicity risk")
         ]
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for interaction in interactions:
-            cursor.execute('''
-                INSERT OR IGNORE INTO drug_interactions 
+        # The table has no unique constraint, so skip pairs that are already present
+        with self.db.transaction() as conn:
+            conn.executemany('''
+                INSERT INTO drug_interactions 
                 (drug1, drug2, interaction_type, severity, description)
-                VALUES (?, ?, ?, ?, ?)
-            ''', interaction)
-        
-        conn.commit()
-        conn.close()
+                SELECT ?, ?, ?, ?, ?
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM drug_interactions WHERE drug1 = ?1 AND drug2 = ?2
+                )
+            ''', interactions)
+            self.interaction_index.rebuild(conn)
     
     def calculate_health_risk_score(self, patient_data: Dict) -> Dict:
         """Calculate comprehensive health risk score"""
@@ -189,87 +750,147 @@ class MedicalDataProcessor:
         
         return recommendations
     
+    def risk_inputs(self, patients) -> Tuple[Dict[str, np.ndarray], Optional[pd.Index]]:
+        """Columnar risk inputs from a DataFrame or a mapping of arrays, with scalar defaults"""
+        frame = patients if isinstance(patients, pd.DataFrame) else pd.DataFrame(dict(patients))
+        length = len(frame)
+        columns = {}
+        for name, default in RISK_INPUT_DEFAULTS.items():
+            if name == 'family_history' and name not in frame and 'family_history_count' in frame:
+                name_in_frame = 'family_history_count'
+            else:
+                name_in_frame = name
+            if name_in_frame not in frame:
+                columns[name] = np.full(length, default, dtype=float)
+                continue
+
+            column = frame[name_in_frame]
+            if name == 'family_history' and column.dtype == object:
+                # Lists of conditions, as accepted by the scalar API
+                column = column.map(lambda value: len(value) if isinstance(value, (list, tuple, set)) else value)
+            if name in ('smoking', 'diabetes'):
+                columns[name] = column.fillna(default).to_numpy().astype(bool)
+            else:
+                columns[name] = pd.to_numeric(column).fillna(default).to_numpy(dtype=float)
+        return columns, frame.index
+
+    def calculate_health_risk_scores(self, patients, include_recommendations: bool = False) -> pd.DataFrame:
+        """Vectorized calculate_health_risk_score over many patients, returned column-wise"""
+        columns, index = self.risk_inputs(patients)
+        age, bmi = columns['age'], columns['bmi']
+        systolic, diastolic = columns['bp_systolic'], columns['bp_diastolic']
+        cholesterol = columns['cholesterol']
+        smoking, diabetes = columns['smoking'], columns['diabetes']
+
+        # Same expressions and evaluation order as the scalar version, so floats match bit for bit
+        age_risk = np.where(age > 20, np.minimum((age - 20) / 60 * 100, 100), 0.0)
+        bmi_risk = np.select([bmi > 30, bmi > 25], [40.0, 20.0], 0.0)
+        bp_risk = np.select(
+            [(systolic > 140) | (diastolic > 90), (systolic > 130) | (diastolic > 85)],
+            [50.0, 25.0], 0.0
+        )
+        cholesterol_risk = np.where(cholesterol > 200, np.maximum((cholesterol - 200) / 100 * 30, 0), 0.0)
+        lifestyle_risk = np.where(smoking, 30.0, 0.0) + np.where(diabetes, 25.0, 0.0)
+        family_risk = columns['family_history'] * 10
+
+        total_risk = (
+            age_risk * 0.2 +
+            bmi_risk * 0.15 +
+            bp_risk * 0.25 +
+            cholesterol_risk * 0.15 +
+            lifestyle_risk * 0.15 +
+            family_risk * 0.1
+        )
+        risk_level = pd.Categorical.from_codes(
+            np.select([total_risk > 70, total_risk > 50, total_risk > 30], [3, 2, 1], 0),
+            categories=RISK_LEVELS
+        )
+
+        components = [age_risk, bmi_risk, bp_risk, cholesterol_risk, lifestyle_risk, family_risk]
+        result = pd.DataFrame({'total_risk_score': round_like_python(total_risk), 'risk_level': risk_level},
+                              index=index)
+        for name, values in zip(RISK_COMPONENT_COLUMNS, components):
+            result[name] = round_like_python(values)
+
+        if include_recommendations:
+            result['recommendations'] = self.batch_risk_recommendations(
+                total_risk > 50, bmi > 25, systolic > 130, cholesterol > 200, smoking, age > 40
+            )
+        return result
+
+    def batch_risk_recommendations(self, *conditions: np.ndarray) -> List[Tuple[str, ...]]:
+        """Recommendations for each row, computed once per distinct combination of triggers"""
+        codes = np.zeros(len(conditions[0]), dtype=np.int64)
+        for bit, condition in enumerate(conditions):
+            codes |= condition.astype(np.int64) << bit
+
+        by_code = {}
+        for code in np.unique(codes).tolist():
+            high_risk, overweight, high_bp, high_cholesterol, smoker, over_40 = (
+                bool(code >> bit & 1) for bit in range(len(conditions))
+            )
+            by_code[code] = tuple(self.get_risk_recommendations(51 if high_risk else 0, {
+                'bmi': 26 if overweight else 0,
+                'blood_pressure_systolic': 131 if high_bp else 0,
+                'cholesterol': 201 if high_cholesterol else 0,
+                'smoking': smoker,
+                'age': 41 if over_40 else 0
+            }))
+        # Rows share one immutable tuple per combination
+        return [by_code[code] for code in codes.tolist()]
+    
     def check_drug_interactions(self, medications: List[str]) -> List[Dict]:
         """Check for drug interactions"""
-        interactions = []
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for i, med1 in enumerate(medications):
-            for med2 in medications[i+1:]:
-                # Check both directions of interaction
-                cursor.execute('''
-                    SELECT * FROM drug_interactions 
-                    WHERE (drug1 = ? AND drug2 = ?) OR (drug1 = ? AND drug2 = ?)
-                ''', (med1, med2, med2, med1))
-                
-                result = cursor.fetchone()
-                if result:
-                    interactions.append({
-                        'drug1': result[1],
-                        'drug2': result[2],
-                        'interaction_type': result[3],
-                        'severity': result[4],
-                        'description': result[5]
-                    })
-        
-        conn.close()
-        return interactions
+        self.interaction_index.ensure_fresh(self.db.connection())
+        return self.interaction_index.check(medications)
+    
+    def check_drug_interactions_bulk(self, medication_lists: Iterable[Sequence[str]]) -> List[List[Dict]]:
+        """Check many patients' medication lists in one pass"""
+        self.interaction_index.ensure_fresh(self.db.connection())
+        return self.interaction_index.check_many(medication_lists)
     
     def analyze_symptom_patterns(self, patient_id: str, days: int = 30) -> Dict:
         """Analyze symptom patterns over time"""
-        conn = sqlite3.connect(self.db_path)
-        
-        # Get patient history from last N days
+        patterns = self.analyze_symptom_patterns_all(days, patient_ids=[patient_id])
+        return patterns.get(patient_id, {'message': 'No recent history found'})
+    
+    def analyze_symptom_patterns_all(self, days: int = 30, chunksize: int = 50000,
+                                     patient_ids: Optional[Sequence[str]] = None) -> Dict[str, Dict]:
+        """Symptom patterns for every patient (or the given ones) in one chunked pass over patient_history"""
+        cutoff_date = datetime.now() - timedelta(days=days)
         query = '''
-            SELECT symptoms, diagnosis, severity_score, date_recorded
-            FROM patient_history 
-            WHERE patient_id = ? AND date_recorded >= ?
-            ORDER BY date_recorded DESC
+            SELECT patient_id, symptoms, severity_score,
+                   julianday(date_recorded) - julianday(?) AS t
+            FROM patient_history
+            WHERE date_recorded >= ?
         '''
-        
-        cutoff_date = datetime.now() - timedelta(days=days)
-        df = pd.read_sql_query(query, conn, params=(patient_id, cutoff_date))
-        conn.close()
-        
-        if df.empty:
-            return {'message': 'No recent history found'}
-        
-        # Analyze patterns
-        avg_severity = df['severity_score'].mean()
-        symptom_frequency = {}
-        
-        for symptoms in df['symptoms']:
-            for symptom in symptoms.split(','):
-                symptom = symptom.strip().lower()
-                symptom_frequency[symptom] = symptom_frequency.get(symptom, 0) + 1
-        
-        most_common_symptoms = sorted(symptom_frequency.items(), key=lambda x: x[1], reverse=True)[:5]
-        
-        # Trend analysis
-        df['date_recorded'] = pd.to_datetime(df['date_recorded'])
-        df = df.sort_values('date_recorded')
-        
-        if len(df) > 1:
-            severity_trend = "improving" if df['severity_score'].iloc[-1] < df['severity_score'].iloc[0] else "worsening"
-        else:
-            severity_trend = "stable"
-        
-        return {
-            'average_severity': round(avg_severity, 2),
-            'most_common_symptoms': most_common_symptoms,
-            'severity_trend': severity_trend,
-            'total_episodes': len(df),
-            'analysis_period_days': days
-        }
+        conn = self.db.connection()
+        accumulator = SymptomPatternAccumulator()
+        for batch in id_batches(patient_ids):
+            params: List = [cutoff_date, cutoff_date]
+            batch_query = query
+            if batch is not None:
+                batch_query += f" AND patient_id IN ({', '.join('?' * len(batch))})"
+                params.extend(batch)
+            for chunk in pd.read_sql_query(batch_query, conn, params=params, chunksize=chunksize):
+                accumulator.add_chunk(chunk)
+        return accumulator.results(days)
     
     def generate_health_report(self, patient_id: str, patient_data: Dict) -> Dict:
         """Generate comprehensive health report"""
-        risk_assessment = self.calculate_health_risk_score(patient_data)
-        symptom_patterns = self.analyze_symptom_patterns(patient_id)
-        
         medications = patient_data.get('current_medications', [])
-        drug_interactions = self.check_drug_interactions(medications)
+        return self.build_health_report(
+            patient_id,
+            patient_data,
+            self.analyze_symptom_patterns(patient_id),
+            self.check_drug_interactions(medications),
+            self.get_health_metrics_summary(patient_id)
+        )
+    
+    def build_health_report(self, patient_id: str, patient_data: Dict, symptom_patterns: Dict,
+                            drug_interactions: List[Dict], health_metrics: Dict) -> Dict:
+        """Assemble a report from already computed sections"""
+        risk_assessment = self.calculate_health_risk_score(patient_data)
         
         report = {
             'patient_id': patient_id,
@@ -277,7 +898,7 @@ class MedicalDataProcessor:
             'risk_assessment': risk_assessment,
             'symptom_patterns': symptom_patterns,
             'drug_interactions': drug_interactions,
-            'health_metrics': self.get_health_metrics_summary(patient_id),
+            'health_metrics': health_metrics,
             'recommendations': {
                 'immediate': [],
                 'short_term': [],
@@ -295,45 +916,456 @@ class MedicalDataProcessor:
         
         return report
     
+    def generate_health_reports_batch(self, patient_ids: Sequence[str],
+                                      patient_data: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+        """Reports for a batch of patients with one query per section"""
+        patient_data = patient_data or {}
+        patterns = self.analyze_symptom_patterns_all(patient_ids=patient_ids)
+        metrics = self.get_health_metrics_summaries(patient_ids)
+        interactions = self.check_drug_interactions_bulk(
+            [patient_data.get(patient_id, {}).get('current_medications', []) for patient_id in patient_ids]
+        )
+        
+        return [
+            self.build_health_report(
+                patient_id,
+                patient_data.get(patient_id, {}),
+                patterns.get(patient_id, {'message': 'No recent history found'}),
+                patient_interactions,
+                metrics.get(patient_id, {})
+            )
+            for patient_id, patient_interactions in zip(patient_ids, interactions)
+        ]
+    
+    def generate_health_reports(self, patient_ids: Iterable[str],
+                                patient_data: Optional[Dict[str, Dict]] = None,
+                                workers: Optional[int] = None,
+                                batch_size: int = QUERY_BATCH_SIZE) -> Iterator[Dict]:
+        """Reports for many patients across a process pool, yielded as each batch completes"""
+        global _REPORT_PROCESSOR
+        patient_data = patient_data or {}
+        batches = (
+            (batch, {patient_id: patient_data[patient_id] for patient_id in batch if patient_id in patient_data})
+            for batch in id_batches(list(patient_ids), batch_size)
+        )
+        workers = workers or os.cpu_count() or 1
+        
+        if workers == 1:
+            for batch, data in batches:
+                yield from self.generate_health_reports_batch(batch, data)
+            return
+        
+        # Load the interaction index before forking so workers share it copy-on-write
+        self.interaction_index.ensure_fresh(self.db.connection())
+        _REPORT_PROCESSOR = self
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        with context.Pool(workers, initializer=init_report_worker, initargs=(self.db_path,)) as pool:
+            for reports in pool.imap_unordered(generate_report_batch, batches):
+                yield from reports
+    
+    def export_reports(self, path: str, patient_ids: Iterable[str], patient_data: Optional[Dict[str, Dict]] = None,
+                       fmt: str = 'parquet', row_group_size: int = 100000, workers: Optional[int] = None) -> int:
+        """Generate reports and write them as flat columnar rows"""
+        with ColumnarWriter(path, export_schema('reports'), fmt, row_group_size) as writer:
+            for report in self.generate_health_reports(patient_ids, patient_data, workers):
+                writer.write(flatten_report(report))
+        return writer.rows_written
+    
+    def export_symptom_patterns(self, path: str, days: int = 30, fmt: str = 'parquet',
+                                row_group_size: int = 100000) -> int:
+        """Write analyze_symptom_patterns_all results as flat columnar rows"""
+        with ColumnarWriter(path, export_schema('patterns'), fmt, row_group_size) as writer:
+            for patient_id, patterns in self.analyze_symptom_patterns_all(days).items():
+                writer.write({'patient_id': patient_id, **flatten_patterns(patterns),
+                              'analysis_period_days': days})
+        return writer.rows_written
+    
+    def export_risk_scores(self, path: str, input_path: str, fmt: str = 'parquet',
+                           row_group_size: int = 100000, chunksize: int = 100000) -> int:
+        """Score a CSV or NDJSON patient file chunk by chunk and write the scores"""
+        if input_path.lower().endswith('.csv'):
+            chunks = pd.read_csv(input_path, chunksize=chunksize, dtype={'patient_id': str})
+        else:
+            chunks = pd.read_json(input_path, lines=True, chunksize=chunksize, dtype={'patient_id': str})
+        
+        with ColumnarWriter(path, export_schema('risk'), fmt, row_group_size) as writer:
+            for chunk in chunks:
+                scores = self.calculate_health_risk_scores(chunk)
+                scores.insert(0, 'patient_id', chunk['patient_id'].astype(str).to_numpy())
+                scores['risk_level'] = scores['risk_level'].astype(str)
+                writer.write_frame(scores)
+        return writer.rows_written
+    
     def get_health_metrics_summary(self, patient_id: str) -> Dict:
         """Get summary of health metrics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        return self.get_health_metrics_summaries([patient_id]).get(patient_id, {})
+    
+    def get_health_metrics_summaries(self, patient_ids: Sequence[str]) -> Dict[str, Dict]:
+        """90-day metric summaries for many patients, keyed by patient id"""
+        cursor = self.db.connection().cursor()
+        cutoff = datetime.now() - timedelta(days=90)
+        cutoff_day = cutoff.date()
         
-        cursor.execute('''
-            SELECT metric_type, AVG(value) as avg_value, unit, 
-                   normal_range_min, normal_range_max, COUNT(*) as readings
-            FROM health_metrics 
-            WHERE patient_id = ? AND date_recorded >= ?
-            GROUP BY metric_type
-        ''', (patient_id, datetime.now() - timedelta(days=90)))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        metrics = {}
-        for result in results:
-            metric_type, avg_value, unit, min_normal, max_normal, readings = result
-            
-            status = "Normal"
-            if avg_value < min_normal:
-                status = "Below Normal"
-            elif avg_value > max_normal:
-                status = "Above Normal"
+        summaries: Dict[str, Dict] = {}
+        for batch in id_batches(patient_ids):
+            placeholders = ', '.join('?' * len(batch))
+            # Whole days after the cutoff come from the daily rollup; only the cutoff day reads raw rows.
+            # MAX(day) makes the unit and normal range come from the most recent bucket.
+            cursor.execute(f'''
+                SELECT patient_id, metric_type, SUM(total) / SUM(value_count) as avg_value, unit,
+                       normal_range_min, normal_range_max, SUM(readings) as readings, MAX(day)
+                FROM (
+                    SELECT patient_id, metric_type, total, value_count, readings, unit,
+                           normal_range_min, normal_range_max, day
+                    FROM health_metrics_daily
+                    WHERE patient_id IN ({placeholders}) AND day > ?
+                    UNION ALL
+                    SELECT patient_id, metric_type, TOTAL(value), COUNT(value), COUNT(*), unit,
+                           normal_range_min, normal_range_max, ?
+                    FROM health_metrics
+                    WHERE patient_id IN ({placeholders}) AND date_recorded >= ? AND date_recorded < ?
+                    GROUP BY patient_id, metric_type
+                )
+                GROUP BY patient_id, metric_type
+            ''', (*batch, cutoff_day.isoformat(), cutoff_day.isoformat(),
+                  *batch, cutoff, (cutoff_day + timedelta(days=1)).isoformat()))
             
-            metrics[metric_type] = {
-                'average_value': round(avg_value, 2),
-                'unit': unit,
-                'status': status,
-                'normal_range': f"{min_normal}-{max_normal}",
-                'total_readings': readings
-            }
+            for patient_id, *result in cursor.fetchall():
+                metric_type, metric = self.summarize_metric(*result)
+                summaries.setdefault(patient_id, {})[metric_type] = metric
+        
+        return summaries
+    
+    def summarize_metric(self, metric_type: str, avg_value: float, unit: str, min_normal: float,
+                         max_normal: float, readings: int, _latest_day: str) -> Tuple[str, Dict]:
+        """Report entry for one aggregated metric"""
+        status = "Normal"
+        if avg_value < min_normal:
+            status = "Below Normal"
+        elif avg_value > max_normal:
+            status = "Above Normal"
         
-        return metrics
+        return metric_type, {
+            'average_value': round(avg_value, 2),
+            'unit': unit,
+            'status': status,
+            'normal_range': f"{min_normal}-{max_normal}",
+            'total_readings': readings
+        }
+    
+    def ingest_file(self, path: str, table: str, fmt: Optional[str] = None, chunksize: int = 50000,
+                    restart: bool = False, progress: bool = False) -> Dict:
+        """Stream a CSV or NDJSON export into health_metrics or patient_history, resumably"""
+        if table not in INGEST_SCHEMAS:
+            raise ValueError(f"Unsupported ingest table: {table}")
+        fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        schema = INGEST_SCHEMAS[table]
+        source = os.path.abspath(path)
+        placeholders = ', '.join('?' * len(schema['columns']))
+        insert_sql = f"INSERT INTO {table} ({', '.join(schema['columns'])}) VALUES ({placeholders})"
 
-def main():
+        conn = self.db.connection()
+        checkpoint = conn.execute('''
+            SELECT byte_offset, rows_read, rows_written, rows_rejected
+            FROM ingest_checkpoints WHERE source = ? AND target = ?
+        ''', (source, table)).fetchone()
+        if restart or checkpoint is None or checkpoint[0] > os.path.getsize(path):
+            checkpoint = (0, 0, 0, 0)
+        offset, rows_read, rows_written, rows_rejected = checkpoint
+        resumed_from = rows_read
+
+        started = time.perf_counter()
+        with open(path, 'rb') as handle:
+            header = b''.join(self.read_records(handle, 1, fmt)) if fmt == 'csv' else b''
+            if offset:
+                handle.seek(offset)
+            else:
+                offset = handle.tell()
+
+            while True:
+                # Fixed-size record batches keep memory flat and give exact resume offsets
+                lines = self.read_records(handle, chunksize, fmt)
+                if not lines:
+                    break
+                offset += sum(map(len, lines))
+                lines = [line for line in lines if line.strip()]
+
+                frame, malformed = self.parse_ingest_chunk(lines, header, fmt)
+                rows, rejected = self.validate_ingest_chunk(frame, schema)
+
+                with self.db.transaction() as conn:
+                    if table == 'health_metrics':
+                        # Skip the per-row rollup trigger and merge the chunk's buckets in one statement
+                        after_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM health_metrics").fetchone()[0]
+                        conn.execute("UPDATE rollup_control SET deferred = 1 WHERE id = 1")
+                    conn.executemany(insert_sql, zip(*(
+                        rows[column].to_numpy(dtype=object, na_value=None) for column in schema['columns']
+                    )))
+                    if table == 'health_metrics':
+                        self.merge_metric_rollups(conn.cursor(), after_id)
+                        conn.execute("UPDATE rollup_control SET deferred = 0 WHERE id = 1")
+                    rows_read += len(lines)
+                    rows_written += len(rows)
+                    rows_rejected += rejected + malformed
+                    # Same transaction as the rows, so a crash never loses or repeats a chunk
+                    conn.execute('''
+                        INSERT INTO ingest_checkpoints
+                            (source, target, byte_offset, rows_read, rows_written, rows_rejected, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (source, target) DO UPDATE SET
+                            byte_offset = excluded.byte_offset,
+                            rows_read = excluded.rows_read,
+                            rows_written = excluded.rows_written,
+                            rows_rejected = excluded.rows_rejected,
+                            updated_at = excluded.updated_at
+                    ''', (source, table, offset, rows_read, rows_written, rows_rejected, datetime.now()))
+
+                if progress:
+                    elapsed = time.perf_counter() - started
+                    print(f"{rows_read:,} rows read, {rows_written:,} written "
+                          f"({(rows_read - resumed_from) / elapsed:,.0f} rows/s)", file=sys.stderr)
+
+        elapsed = time.perf_counter() - started
+        return {
+            'source': source,
+            'table': table,
+            'rows_read': rows_read,
+            'rows_written': rows_written,
+            'rows_rejected': rows_rejected,
+            'resumed_from_row': resumed_from,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round((rows_read - resumed_from) / elapsed) if elapsed else None
+        }
+    
+    @staticmethod
+    def read_records(handle: IO[bytes], count: int, fmt: str) -> List[bytes]:
+        """Up to count raw records; a quoted CSV field may span several physical lines"""
+        if fmt != 'csv':
+            return list(islice(handle, count))
+        records = []
+        pending: List[bytes] = []
+        quotes = 0
+        for line in handle:
+            pending.append(line)
+            # Escaped quotes come in pairs, so a record ends where its quotes balance
+            quotes += line.count(b'"')
+            if quotes % 2 == 0:
+                records.append(b''.join(pending))
+                pending, quotes = [], 0
+                if len(records) == count:
+                    break
+        if pending:
+            # An unterminated quote at end of file; the parser rejects it
+            records.append(b''.join(pending))
+        return records
+    
+    def parse_ingest_chunk(self, lines: List[bytes], header: bytes, fmt: str) -> Tuple[pd.DataFrame, int]:
+        """DataFrame for a batch of raw lines, plus the number of lines that could not be parsed"""
+        if not lines:
+            return pd.DataFrame(), 0
+        if fmt == 'csv':
+            frame = pd.read_csv(io.BytesIO(header + b''.join(lines)), dtype=str, on_bad_lines='skip')
+            return frame, len(lines) - len(frame)
+
+        try:
+            frame = pd.read_json(io.BytesIO(b''.join(lines)), lines=True, dtype=False, convert_dates=False)
+            return frame, 0
+        except ValueError:
+            # Fall back to line-by-line so one corrupt record only costs itself
+            records = []
+            for line in lines:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    records.append(record)
+            return pd.DataFrame.from_records(records), len(lines) - len(records)
+    
+    def validate_ingest_chunk(self, frame: pd.DataFrame, schema: Dict) -> Tuple[pd.DataFrame, int]:
+        """Coerce a parsed chunk to the table's columns and drop invalid rows, column-wise"""
+        rows = pd.DataFrame(index=frame.index)
+        valid = pd.Series(True, index=frame.index)
+
+        for column in schema['columns']:
+            values = frame[column] if column in frame else pd.Series(None, index=frame.index, dtype=object)
+            if column in schema['numeric']:
+                numbers = pd.to_numeric(values, errors='coerce')
+                # A value that was present but not a number is an error, not a missing field
+                valid &= numbers.notna() | values.isna()
+                if column in schema['required_numeric']:
+                    valid &= numbers.notna()
+                rows[column] = numbers
+            elif column == 'date_recorded':
+                dates = pd.to_datetime(values, errors='coerce', format='mixed')
+                if getattr(dates.dt, 'tz', None) is not None:
+                    dates = dates.dt.tz_convert(None)
+                valid &= dates.notna()
+                rows[column] = dates.dt.strftime('%Y-%m-%d %H:%M:%S.%f')
+            else:
+                if column == 'medications':
+                    # NDJSON exports may carry medication lists
+                    values = values.map(lambda value: ','.join(map(str, value)) if isinstance(value, list) else value)
+                text = values.astype(object).where(values.notna()).astype('string').str.strip()
+                if column in schema['required']:
+                    valid &= text.notna() & (text != '')
+                rows[column] = text
+
+        if 'normal_range_min' in rows and 'normal_range_max' in rows:
+            low = pd.to_numeric(rows['normal_range_min'])
+            high = pd.to_numeric(rows['normal_range_max'])
+            valid &= ~(low > high)
+
+        return rows[valid], int((~valid).sum())
+
+def require_pyarrow():
+    """Import pyarrow on first use so the rest of the processor works without it"""
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise RuntimeError("Columnar export requires pyarrow (pip install pyarrow)") from exc
+    return pa
+
+def export_schema(kind: str):
+    """Flat, typed Arrow schema for an export kind"""
+    pa = require_pyarrow()
+    interaction = pa.struct([('drug1', pa.string()), ('drug2', pa.string()), ('interaction_type', pa.string()),
+                             ('severity', pa.string()), ('description', pa.string())])
+    metric = pa.struct([('metric_type', pa.string()), ('average_value', pa.float64()), ('unit', pa.string()),
+                        ('status', pa.string()), ('normal_range', pa.string()), ('total_readings', pa.int64())])
+    symptom = pa.struct([('symptom', pa.string()), ('count', pa.int32())])
+    risk_fields = [('total_risk_score', pa.float64()), ('risk_level', pa.string())]
+    risk_fields += [(name, pa.float64()) for name in RISK_COMPONENT_COLUMNS]
+    pattern_fields = [('average_severity', pa.float64()), ('most_common_symptoms', pa.list_(symptom)),
+                      ('severity_trend', pa.string()),
+                      ('severity_slope_per_day', pa.float64()), ('total_episodes', pa.int32())]
+
+    if kind == 'risk':
+        return pa.schema([('patient_id', pa.string())] + risk_fields)
+    if kind == 'patterns':
+        return pa.schema([('patient_id', pa.string())] + pattern_fields + [('analysis_period_days', pa.int32())])
+    if kind == 'reports':
+        return pa.schema(
+            [('patient_id', pa.string()), ('report_date', pa.timestamp('us'))]
+            + risk_fields
+            + [('risk_recommendations', pa.list_(pa.string()))]
+            + [(f"symptom_{name}", field_type) for name, field_type in pattern_fields]
+            + [('drug_interaction_count', pa.int32()), ('high_severity_interaction_count', pa.int32()),
+               ('drug_interactions', pa.list_(interaction)), ('health_metrics', pa.list_(metric)),
+               ('immediate_recommendations', pa.list_(pa.string())),
+               ('short_term_recommendations', pa.list_(pa.string()))]
+        )
+    raise ValueError(f"Unknown export kind: {kind}")
+
+def flatten_risk(risk: Dict) -> Dict:
+    row = {'total_risk_score': risk['total_risk_score'], 'risk_level': risk['risk_level']}
+    row.update({name: float(risk['risk_factors'][name]) for name in RISK_COMPONENT_COLUMNS})
+    return row
+
+def flatten_patterns(patterns: Dict, prefix: str = '') -> Dict:
+    symptoms = patterns.get('most_common_symptoms') or []
+    return {
+        f"{prefix}average_severity": patterns.get('average_severity'),
+        f"{prefix}most_common_symptoms": [{'symptom': name, 'count': count} for name, count in symptoms],
+        f"{prefix}severity_trend": patterns.get('severity_trend'),
+        f"{prefix}severity_slope_per_day": patterns.get('severity_slope_per_day'),
+        f"{prefix}total_episodes": patterns.get('total_episodes', 0)
+    }
+
+def flatten_report(report: Dict) -> Dict:
+    """One flat row per report; nested sections become typed columns or lists of structs"""
+    interactions = report['drug_interactions']
+    row = {'patient_id': report['patient_id'], 'report_date': datetime.fromisoformat(report['report_date'])}
+    row.update(flatten_risk(report['risk_assessment']))
+    row['risk_recommendations'] = list(report['risk_assessment']['recommendations'])
+    row.update(flatten_patterns(report['symptom_patterns'], 'symptom_'))
+    row.update({
+        'drug_interaction_count': len(interactions),
+        'high_severity_interaction_count': sum(1 for item in interactions if item['severity'] == 'High'),
+        'drug_interactions': interactions,
+        'health_metrics': [{'metric_type': metric_type, **metric}
+                           for metric_type, metric in report['health_metrics'].items()],
+        'immediate_recommendations': report['recommendations']['immediate'],
+        'short_term_recommendations': report['recommendations']['short_term']
+    })
+    return row
+
+class ColumnarWriter:
+    """Buffers flat rows and writes them as Parquet row groups or Arrow IPC record batches"""
+
+    def __init__(self, path: str, schema, fmt: str = 'parquet', row_group_size: int = 100000):
+        pa = require_pyarrow()
+        self.pa = pa
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.rows: List[Dict] = []
+        self.rows_written = 0
+        if fmt == 'parquet':
+            self.writer = pa.parquet.ParquetWriter(path, schema, compression='zstd')
+        elif fmt == 'arrow':
+            # Uncompressed IPC files can be memory-mapped and read without copying
+            self.sink = pa.OSFile(path, 'wb')
+            self.writer = pa.ipc.new_file(self.sink, schema)
+        else:
+            raise ValueError(f"Unknown export format: {fmt}")
+        self.fmt = fmt
+
+    def write(self, row: Dict):
+        self.rows.append(row)
+        if len(self.rows) >= self.row_group_size:
+            self.flush()
+
+    def write_frame(self, frame: pd.DataFrame):
+        """Write a DataFrame whose columns already match the schema"""
+        self.flush()
+        table = self.pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+        for batch in table.to_batches(max_chunksize=self.row_group_size):
+            self.write_batch(batch)
+
+    def flush(self):
+        if self.rows:
+            self.write_batch(self.pa.RecordBatch.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def write_batch(self, batch):
+        if self.fmt == 'parquet':
+            self.writer.write_table(self.pa.Table.from_batches([batch]), row_group_size=self.row_group_size)
+        else:
+            self.writer.write_batch(batch)
+        self.rows_written += batch.num_rows
+
+    def close(self, flush: bool = True):
+        if flush:
+            self.flush()
+        self.writer.close()
+        if self.fmt == 'arrow':
+            self.sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(flush=exc_type is None)
+
+# Worker-side processor for generate_health_reports; inherited from the parent under fork
+_REPORT_PROCESSOR: Optional['MedicalDataProcessor'] = None
+
+def init_report_worker(db_path: str):
+    """Pool initializer: reuse the forked processor or open one (spawn platforms)"""
+    global _REPORT_PROCESSOR
+    if _REPORT_PROCESSOR is None or _REPORT_PROCESSOR.db_path != db_path:
+        _REPORT_PROCESSOR = MedicalDataProcessor(db_path)
+
+def generate_report_batch(task: Tuple[Sequence[str], Dict[str, Dict]]) -> List[Dict]:
+    patient_ids, patient_data = task
+    return _REPORT_PROCESSOR.generate_health_reports_batch(patient_ids, patient_data)
+
+def run_example(db_path: str):
     """Example usage of Medical Data Processor"""
-    processor = MedicalDataProcessor()
+    processor = MedicalDataProcessor(db_path)
     
     # Example patient data
     patient_data = {
@@ -355,5 +1387,193 @@ def main():
     print("=" * 50)
     print(json.dumps(report, indent=2))
 
+def benchmark_interactions(drugs: int, interactions: int, list_size: int, lists: int, seed: int = 7):
+    """Compare per-pair SQL lookups with the in-memory interaction index"""
+    rng = random.Random(seed)
+    names = [f"Drug{i:05d}" for i in range(drugs)]
+    rows = set()
+    while len(rows) < interactions:
+        a, b = rng.sample(names, 2)
+        rows.add((a, b))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        processor = MedicalDataProcessor(os.path.join(tmp, "bench.db"))
+        with processor.db.transaction() as conn:
+            conn.executemany('''
+                INSERT INTO drug_interactions (drug1, drug2, interaction_type, severity, description)
+                VALUES (?, ?, 'Synthetic', 'Medium', 'Benchmark interaction')
+            ''', sorted(rows))
+
+        started = time.perf_counter()
+        processor.interaction_index.rebuild(processor.db.connection())
+        build_ms = (time.perf_counter() - started) * 1000
+
+        medication_lists = [rng.sample(names, list_size) for _ in range(lists)]
+
+        # Baseline: one query per unordered pair, as check_drug_interactions used to do
+        cursor = processor.db.connection().cursor()
+        sample = medication_lists[:min(lists, 200)]
+        started = time.perf_counter()
+        for medications in sample:
+            for i, med1 in enumerate(medications):
+                for med2 in medications[i+1:]:
+                    cursor.execute('''
+                        SELECT * FROM drug_interactions
+                        WHERE (drug1 = ? AND drug2 = ?) OR (drug1 = ? AND drug2 = ?)
+                    ''', (med1, med2, med2, med1)).fetchone()
+        sql_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+        index = processor.interaction_index
+        index.check_many(medication_lists)  # warm the name normalization cache
+        started = time.perf_counter()
+        results = index.check_many(medication_lists)
+        index_us = (time.perf_counter() - started) / lists * 1e6
+        processor.close()
+
+    print(f"Interaction index: {index.stats()['drugs']} drugs, {index.stats()['pairs']} pairs, built in {build_ms:.1f} ms")
+    print(f"Lists of {list_size} drugs: {sum(map(len, results)) / lists:.2f} interactions per list")
+    print(f"  per-pair SQL: {sql_us:10.1f} us/list")
+    print(f"  index:        {index_us:10.1f} us/list ({sql_us / index_us:.0f}x faster)")
+
+def synthetic_patients(rows: int, seed: int = 7) -> pd.DataFrame:
+    """Random patient population for benchmarks"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'age': rng.integers(18, 95, rows),
+        'bmi': np.round(rng.normal(26, 5, rows), 1),
+        'bp_systolic': rng.integers(95, 190, rows),
+        'bp_diastolic': rng.integers(55, 120, rows),
+        'cholesterol': rng.integers(120, 320, rows),
+        'smoking': rng.random(rows) < 0.2,
+        'diabetes': rng.random(rows) < 0.1,
+        'family_history': rng.integers(0, 4, rows)
+    })
+
+def benchmark_risk_scores(rows: int, scalar_rows: int, include_recommendations: bool):
+    """Compare the scalar and vectorized risk scoring paths"""
+    processor = MedicalDataProcessor(":memory:")
+    patients = synthetic_patients(rows)
+
+    started = time.perf_counter()
+    scores = processor.calculate_health_risk_scores(patients, include_recommendations)
+    vector_seconds = time.perf_counter() - started
+
+    sample = patients.head(scalar_rows)
+    records = sample.to_dict('records')
+    for record in records:
+        record['family_history'] = ['condition'] * int(record['family_history'])
+    started = time.perf_counter()
+    expected = [processor.calculate_health_risk_score(record) for record in records]
+    scalar_seconds = (time.perf_counter() - started) / len(records) * rows
+
+    mismatches = 0
+    for i, item in enumerate(expected):
+        row = scores.iloc[i]
+        same = (item['total_risk_score'] == row['total_risk_score'] and item['risk_level'] == row['risk_level']
+                and all(item['risk_factors'][name] == row[name] for name in RISK_COMPONENT_COLUMNS))
+        if include_recommendations:
+            same = same and item['recommendations'] == list(row['recommendations'])
+        mismatches += not same
+
+    print(f"Risk scoring for {rows:,} patients (recommendations: {include_recommendations})")
+    print(f"  scalar:     {scalar_seconds:8.2f} s (extrapolated from {len(records):,} rows)")
+    print(f"  vectorized: {vector_seconds:8.2f} s ({rows / vector_seconds:,.0f} rows/s, "
+          f"{scalar_seconds / vector_seconds:.0f}x faster)")
+    print(f"  mismatches against scalar on the sample: {mismatches}")
+
+def read_report_requests(stream: IO[str]) -> Tuple[List[str], Dict[str, Dict]]:
+    """Patient ids and per-patient data from NDJSON objects or bare ids, one per line"""
+    patient_ids, patient_data = [], {}
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('{'):
+            record = json.loads(line)
+            patient_id = str(record.pop('patient_id'))
+            patient_data[patient_id] = record
+        else:
+            patient_id = line
+        patient_ids.append(patient_id)
+    return patient_ids, patient_data
+
+def main():
+    parser = argparse.ArgumentParser(description="Medical data processing and analysis")
+    parser.add_argument('--db', default="medical_data.db", help="SQLite database path")
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('report', help="Print an example health report (default)")
+
+    bench = commands.add_parser('bench-interactions', help="Benchmark drug interaction lookups")
+    bench.add_argument('--drugs', type=int, default=5000)
+    bench.add_argument('--interactions', type=int, default=50000)
+    bench.add_argument('--list-size', type=int, default=20)
+    bench.add_argument('--lists', type=int, default=10000)
+
+    bench_risk = commands.add_parser('bench-risk', help="Benchmark batch health risk scoring")
+    bench_risk.add_argument('--rows', type=int, default=1000000)
+    bench_risk.add_argument('--scalar-rows', type=int, default=20000)
+    bench_risk.add_argument('--recommendations', action='store_true')
+
+    patterns = commands.add_parser('patterns', help="Symptom patterns for every patient as NDJSON")
+    patterns.add_argument('--days', type=int, default=30)
+    patterns.add_argument('--chunksize', type=int, default=50000)
+
+    ingest = commands.add_parser('ingest', help="Bulk load a CSV or NDJSON export")
+    ingest.add_argument('table', choices=sorted(INGEST_SCHEMAS))
+    ingest.add_argument('path')
+    ingest.add_argument('--format', choices=['csv', 'ndjson'])
+    ingest.add_argument('--chunksize', type=int, default=50000)
+    ingest.add_argument('--restart', action='store_true', help="Ignore any saved checkpoint")
+
+    reports = commands.add_parser('reports', help="Health reports for many patients as NDJSON")
+    reports.add_argument('input', help="NDJSON of {\"patient_id\": ..., <patient data>} or one id per line; - for stdin")
+    reports.add_argument('--workers', type=int, default=None)
+    reports.add_argument('--batch-size', type=int, default=QUERY_BATCH_SIZE)
+
+    export = commands.add_parser('export', help="Write reports, risk scores or symptom patterns as Parquet/Arrow")
+    export.add_argument('kind', choices=['reports', 'risk', 'patterns'])
+    export.add_argument('output')
+    export.add_argument('--input', help="Patient NDJSON (reports) or CSV/NDJSON with patient_id (risk)")
+    export.add_argument('--format', choices=['parquet', 'arrow'], default='parquet')
+    export.add_argument('--row-group-size', type=int, default=100000)
+    export.add_argument('--days', type=int, default=30)
+    export.add_argument('--workers', type=int, default=None)
+
+    args = parser.parse_args()
+    if args.command == 'bench-interactions':
+        benchmark_interactions(args.drugs, args.interactions, args.list_size, args.lists)
+    elif args.command == 'bench-risk':
+        benchmark_risk_scores(args.rows, args.scalar_rows, args.recommendations)
+    elif args.command == 'ingest':
+        processor = MedicalDataProcessor(args.db)
+        report = processor.ingest_file(args.path, args.table, args.format, args.chunksize,
+                                       args.restart, progress=True)
+        print(json.dumps(report, indent=2))
+    elif args.command == 'reports':
+        processor = MedicalDataProcessor(args.db)
+        patient_ids, patient_data = read_report_requests(sys.stdin if args.input == '-' else open(args.input))
+        for report in processor.generate_health_reports(patient_ids, patient_data, args.workers, args.batch_size):
+            sys.stdout.write(json.dumps(report) + "\n")
+    elif args.command == 'export':
+        processor = MedicalDataProcessor(args.db)
+        if args.kind == 'reports':
+            patient_ids, patient_data = read_report_requests(sys.stdin if args.input in (None, '-') else open(args.input))
+            rows = processor.export_reports(args.output, patient_ids, patient_data, args.format,
+                                            args.row_group_size, args.workers)
+        elif args.kind == 'risk':
+            if not args.input:
+                parser.error("export risk requires --input")
+            rows = processor.export_risk_scores(args.output, args.input, args.format, args.row_group_size)
+        else:
+            rows = processor.export_symptom_patterns(args.output, args.days, args.format, args.row_group_size)
+        print(f"Wrote {rows:,} rows to {args.output}", file=sys.stderr)
+    elif args.command == 'patterns':
+        processor = MedicalDataProcessor(args.db)
+        summaries = processor.analyze_symptom_patterns_all(args.days, args.chunksize)
+        for patient_id, summary in summaries.items():
+            print(json.dumps({'patient_id': patient_id, **summary}))
+    else:
+        run_example(args.db)
+
 if __name__ == "__main__":
     main()
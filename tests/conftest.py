@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Import the app against an in-memory database instead of the MySQL default
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+# Token counting without fetching tiktoken's encoding over the network
+os.environ.setdefault('CHAT_TOKENIZER', 'heuristic')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
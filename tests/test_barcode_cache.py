@@ -0,0 +1,147 @@
+import json
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app import Medicine, app, barcode_cache, db
+
+TABLE = Medicine.__table__
+
+
+@pytest.fixture
+def catalog():
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Medicine(id=1, name='Crocin 500', generic_name='Paracetamol', price=20.0, barcode='890001'),
+            Medicine(id=2, name='Dolo 650', generic_name='Paracetamol', price=30.0, barcode='890002'),
+            Medicine(id=3, name='Brufen 400', generic_name='Ibuprofen', price=25.0, barcode='890002'),
+        ])
+        db.session.commit()
+        barcode_cache.refresh()
+        yield db
+        db.session.rollback()
+        db.session.execute(TABLE.delete())
+        db.session.commit()
+        barcode_cache.refresh()
+
+
+@pytest.fixture
+def selects(catalog):
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(catalog.engine, 'before_cursor_execute', listener)
+    yield statements
+    event.remove(catalog.engine, 'before_cursor_execute', listener)
+
+
+def elsewhere(statement):
+    # A write made by another process: it reaches the database but not this cache's listener
+    with db.engine.begin() as conn:
+        conn.execute(statement)
+
+
+def name(medicine):
+    return json.loads(medicine)['name'] if medicine else None
+
+
+def test_hits_come_from_memory_and_the_lowest_id_answers(selects):
+    assert name(barcode_cache.lookup('890001')) == 'Crocin 500'
+    assert name(barcode_cache.lookup('890002')) == 'Dolo 650'
+    assert selects == []
+
+
+def test_miss_is_negatively_cached_until_it_expires(catalog, selects, monkeypatch):
+    monkeypatch.setattr(barcode_cache, 'negative_ttl', 0.1)
+    assert barcode_cache.lookup('890009') is None
+    elsewhere(TABLE.insert().values(id=9, name='Allegra 120', price=90.0, barcode='890009'))
+
+    assert barcode_cache.lookup('890009') is None
+    assert len(selects) == 1
+    time.sleep(0.15)
+    assert name(barcode_cache.lookup('890009')) == 'Allegra 120'
+
+
+def test_negative_cache_is_capped(catalog, monkeypatch):
+    monkeypatch.setattr(barcode_cache, 'negative_size', 2)
+    barcode_cache.lookup_many(['x1', 'x2', 'x3'])
+    assert list(barcode_cache.misses) == ['x2', 'x3']
+
+
+def test_listener_applies_local_commits_at_once(catalog, selects):
+    catalog.session.add(Medicine(id=4, name='Cetzine 10', price=15.0, barcode='890004'))
+    catalog.session.commit()
+    assert name(barcode_cache.lookup('890004')) == 'Cetzine 10'
+
+    catalog.session.delete(catalog.session.get(Medicine, 2))
+    catalog.session.commit()
+    selects.clear()
+    assert name(barcode_cache.lookup('890002')) == 'Brufen 400'
+
+    catalog.session.delete(catalog.session.get(Medicine, 4))
+    catalog.session.commit()
+    selects.clear()
+    assert barcode_cache.lookup('890004') is None
+    # Gone locally, so the barcode is checked against the database like any unknown one
+    assert len(selects) == 1
+
+
+def test_other_processes_writes_show_up_after_the_positive_ttl(catalog, monkeypatch):
+    elsewhere(TABLE.update().where(TABLE.c.id == 1).values(name='Crocin Advance'))
+    assert name(barcode_cache.lookup('890001')) == 'Crocin 500'
+
+    monkeypatch.setattr(barcode_cache, 'positive_ttl', 0)
+    assert name(barcode_cache.lookup('890001')) == 'Crocin Advance'
+    elsewhere(TABLE.delete().where(TABLE.c.id == 1))
+    assert barcode_cache.lookup('890001') is None
+
+
+def test_read_raced_by_a_commit_is_not_cached(catalog, monkeypatch):
+    elsewhere(TABLE.insert().values(id=5, name='Pan 40', price=50.0, barcode='890005'))
+    select_rows = barcode_cache.select_rows
+
+    def racing_select(*filters):
+        rows = select_rows(*filters)
+        # Committed while the unlocked read is in flight
+        catalog.session.delete(catalog.session.get(Medicine, 5))
+        catalog.session.commit()
+        return rows
+
+    monkeypatch.setattr(barcode_cache, 'select_rows', racing_select)
+    assert name(barcode_cache.lookup('890005')) == 'Pan 40'
+    monkeypatch.undo()
+
+    assert 5 not in barcode_cache.barcodes
+    assert barcode_cache.lookup('890005') is None
+
+
+def test_bulk_scan_keeps_request_order_and_counts_duplicates(catalog):
+    response = app.test_client().post('/api/barcode-scan/bulk', json={
+        'barcodes': ['890002', 'unknown', ' 890001 ', '890002', '']
+    })
+
+    body = response.get_json()
+    assert [(result['barcode'], result['found']) for result in body['results']] == [
+        ('890002', True), ('unknown', False), ('890001', True), ('890002', True), ('', False)
+    ]
+    assert body['found'] == 3
+    assert body['results'][0]['medicine'] == body['results'][3]['medicine']
+    assert body['results'][0]['medicine']['name'] == 'Dolo 650'
+
+
+@pytest.mark.parametrize('payload', [{}, {'barcodes': []}, {'barcodes': 'not-a-list'}])
+def test_bulk_scan_rejects_bad_payloads(catalog, payload):
+    assert app.test_client().post('/api/barcode-scan/bulk', json=payload).status_code == 400
+
+
+def test_single_scan_matches_the_bulk_encoding(catalog):
+    client = app.test_client()
+    single = client.post('/api/barcode-scan', json={'barcode': '890001'}).get_json()
+    bulk = client.post('/api/barcode-scan/bulk', json={'barcodes': ['890001']}).get_json()
+    assert single == {'found': True, 'medicine': bulk['results'][0]['medicine']}
+    assert client.post('/api/barcode-scan', json={'barcode': 'nope'}).get_json()['found'] is False
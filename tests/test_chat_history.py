@@ -0,0 +1,147 @@
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app import (ChatHistoryStore, ChatMessage, app, chat_history_store, chatbot, db, latest_chat_message_ids,
+                 load_chat_history)
+
+
+class FakeHistory:
+    # Stands in for the ChatMessage table: session -> [(id, turn)]
+    def __init__(self):
+        self.rows = {}
+        self.loads = 0
+        self.id_loads = 0
+        self.next_id = 1
+
+    def add(self, session_id, message, response='ok'):
+        message_id = self.next_id
+        self.next_id += 1
+        self.rows.setdefault(session_id, []).append((message_id, {'message': message, 'response': response}))
+        return message_id
+
+    def load(self, session_id, limit):
+        self.loads += 1
+        return self.rows.get(session_id, [])[-limit:]
+
+    def load_ids(self, session_id, limit):
+        self.id_loads += 1
+        return [message_id for message_id, _ in self.rows.get(session_id, [])[-limit:]]
+
+
+def make_store(history, **options):
+    return ChatHistoryStore(history.load, history.load_ids, **options)
+
+
+@pytest.fixture
+def database():
+    with app.app_context():
+        db.create_all()
+        yield db
+        ChatMessage.query.delete()
+        db.session.commit()
+
+
+def test_hits_are_served_without_reading_the_database():
+    history = FakeHistory()
+    history.add('s', 'fever')
+    store = make_store(history, check_interval=60)
+
+    assert store.get('s') == [{'message': 'fever', 'response': 'ok'}]
+    store.append('s', 'cough', 'rest', history.add('s', 'cough', 'rest'))
+    assert [turn['message'] for turn in store.get('s')] == ['fever', 'cough']
+    assert (history.loads, history.id_loads) == (1, 0)
+    assert store.stats()['hits'] == 1 and store.stats()['misses'] == 1
+
+
+def test_window_keeps_only_the_latest_turns():
+    history = FakeHistory()
+    store = make_store(history, window=2)
+    store.get('s')
+    for message in ('a', 'b', 'c'):
+        store.append('s', message, 'ok', history.add('s', message))
+    assert [turn['message'] for turn in store.get('s')] == ['b', 'c']
+
+
+def test_stale_buffer_is_reloaded_after_the_check_interval():
+    history = FakeHistory()
+    worker_a = make_store(history, check_interval=0)
+    worker_b = make_store(history, check_interval=0)
+    worker_a.get('s')
+    worker_b.get('s')
+
+    worker_b.append('s', 'from b', 'ok', history.add('s', 'from b'))
+    assert [turn['message'] for turn in worker_a.get('s')] == ['from b']
+    assert history.loads == 3
+
+    # Confirmed unchanged: served from the buffer after one id read
+    loads = history.loads
+    assert [turn['message'] for turn in worker_a.get('s')] == ['from b']
+    assert history.loads == loads and worker_a.stats()['checks'] == 2
+
+
+def test_interleaved_writes_from_two_workers_are_detected():
+    history = FakeHistory()
+    worker_a = make_store(history, check_interval=0)
+    worker_a.get('s')
+    history.add('s', 'from b')
+    # Worker A writes after B, so the latest id alone would match A's buffer
+    worker_a.append('s', 'from a', 'ok', history.add('s', 'from a'))
+    assert [turn['message'] for turn in worker_a.get('s')] == ['from b', 'from a']
+
+
+def test_byte_cap_counts_encoded_bytes_and_evicts_least_recent():
+    history = FakeHistory()
+    history.add('old', 'é' * 10, '')
+    history.add('new', 'é' * 10, '')
+    store = make_store(history, max_bytes=30)
+    store.get('old')
+    assert store.stats()['bytes'] == 20
+
+    store.get('new')
+    assert list(store.sessions) == ['new']
+    assert store.stats()['bytes'] == 20
+
+
+def test_idle_sessions_expire():
+    history = FakeHistory()
+    history.add('s', 'fever')
+    store = make_store(history, idle_ttl=0.05, check_interval=60)
+    store.get('s')
+    time.sleep(0.1)
+    store.get('s')
+    assert history.loads == 2
+    assert store.stats()['hits'] == 0
+
+
+def test_database_loaders_return_ids_oldest_first(database):
+    messages = [ChatMessage(session_id='db', message=f'm{i}', response='r') for i in range(4)]
+    database.session.add_all(messages + [ChatMessage(session_id='other', message='x', response='r')])
+    database.session.commit()
+    ids = [message.id for message in messages]
+
+    assert latest_chat_message_ids('db', 3) == ids[1:]
+    assert [message_id for message_id, _ in load_chat_history('db', 3)] == ids[1:]
+    assert load_chat_history('db', 1)[0][1] == {'message': 'm3', 'response': 'r'}
+
+
+def test_chat_route_reads_no_history_on_a_hit(database, monkeypatch):
+    monkeypatch.setattr(chatbot, 'get_chat_response', lambda message, history, usage: f'{len(history)} turns')
+    client = app.test_client()
+    assert client.post('/api/chat', json={'message': 'first', 'session_id': 'route'}).json['response'] == '0 turns'
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement.split()[0])
+
+    event.listen(database.engine, 'before_cursor_execute', listener)
+    try:
+        response = client.post('/api/chat', json={'message': 'second', 'session_id': 'route'})
+    finally:
+        event.remove(database.engine, 'before_cursor_execute', listener)
+
+    assert response.json['response'] == '1 turns'
+    assert statements == ['INSERT']
+    assert chat_history_store.get('route')[-1] == {'message': 'second', 'response': '1 turns'}
@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from app import app, chatbot, db
+
+
+class StubCompletions(BaseHTTPRequestHandler):
+    # Streams server.tokens as chat completion chunks, server.delay seconds apart,
+    # with chunked transfer encoding like the real API
+    protocol_version = 'HTTP/1.1'
+
+    def send_chunk(self, data):
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        try:
+            for token in self.server.tokens:
+                chunk = {'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]}
+                self.send_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                time.sleep(self.server.delay)
+            self.send_chunk(b"data: [DONE]\n\n")
+            self.send_chunk(b'')
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubCompletions)
+    server.daemon_threads = True
+    server.tokens, server.delay = ['Rest ', 'and ', 'drink ', 'fluids.'], 0.0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # What OPENAI_API_BASE sets at import time
+    monkeypatch.setattr(openai, 'api_base', f"http://127.0.0.1:{server.server_address[1]}/v1")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+    return app.test_client()
+
+
+def events(body):
+    tokens, done = [], None
+    for event in body.decode('utf-8').split('\n\n'):
+        if event.startswith('data: '):
+            tokens.append(json.loads(event[len('data: '):])['token'])
+        elif event.startswith('event: done\ndata: '):
+            done = json.loads(event.split('data: ', 1)[1])
+    return tokens, done
+
+
+def free_slots():
+    return chatbot.llm_slots._value
+
+
+def test_stream_relays_chunks_as_they_arrive(llm, client):
+    slots = free_slots()
+    response = client.post('/api/chat/stream', json={'message': 'I have a mild cold', 'session_id': 'relay'})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    tokens, done = events(response.data)
+    assert tokens == llm.tokens
+    assert done['session_id'] == 'relay'
+    assert free_slots() == slots
+    assert chatbot.response_cache.get('I have a mild cold', []) == ''.join(llm.tokens)
+
+
+def test_stream_stops_at_the_request_timeout(llm, client, monkeypatch):
+    monkeypatch.setattr(chatbot, 'request_timeout', 0.5)
+    llm.tokens, llm.delay = ['one ', 'two ', 'three ', 'four ', 'five ', 'six '], 0.2
+    slots = free_slots()
+    response = client.post('/api/chat/stream', json={'message': 'Slow answer please', 'session_id': 'deadline'})
+
+    tokens, done = events(response.data)
+    assert 0 < len(tokens) < len(llm.tokens)
+    assert done is not None
+    assert free_slots() == slots
+    # A cut-off answer is never cached
+    assert chatbot.response_cache.get('Slow answer please', []) is None
+
+
+def test_stalled_stream_times_out(llm, client, monkeypatch):
+    monkeypatch.setattr(chatbot, 'request_timeout', 0.5)
+    llm.tokens, llm.delay = ['first ', 'never sent'], 2.0
+    slots = free_slots()
+    started = time.monotonic()
+    response = client.post('/api/chat/stream', json={'message': 'Stalled answer', 'session_id': 'stall'})
+
+    tokens, done = events(response.data)
+    assert tokens == ['first ']
+    assert done is not None
+    assert time.monotonic() - started < 2.0
+    assert free_slots() == slots
+
+
+def test_client_disconnect_releases_the_llm_slot(llm, client):
+    llm.delay = 0.2
+    slots = free_slots()
+    response = client.post('/api/chat/stream', json={'message': 'Disconnect midway', 'session_id': 'gone'},
+                           buffered=False)
+    body = iter(response.response)
+    assert json.loads(next(body).decode('utf-8')[len('data: '):])['token'] == llm.tokens[0]
+    assert free_slots() == slots - 1
+
+    response.close()
+    assert free_slots() == slots
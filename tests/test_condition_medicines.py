@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+from app import (MEDICINE_FIELDS, ConditionMedicineIndex, Medicine, app, condition_medicine_index,
+                 condition_medicine_names, db, load_medicine_rows, medicine_search_index, medicine_to_dict)
+
+# The former CONDITION_MEDICINES keys, merged with the knowledge base and the
+# AI service table. A knowledge-base edit that changes these should be deliberate.
+PINNED_NAMES = {
+    'fever': ['Paracetamol', 'Ibuprofen', 'Aspirin', 'Acetaminophen'],
+    'headache': ['Paracetamol', 'Aspirin', 'Ibuprofen', 'Sumatriptan', 'Rest'],
+    'cough': ['Dextromethorphan', 'Guaifenesin', 'Salbutamol', 'Honey', 'Cough syrup'],
+    'stomach pain': ['Omeprazole', 'Ranitidine', 'Antacid', 'Simethicone', 'ORS'],
+    'chest pain': ['Aspirin', 'Nitroglycerin', 'Antacid'],
+    'back pain': ['Ibuprofen', 'Diclofenac', 'Paracetamol', 'Muscle relaxants'],
+    'diabetes': ['Metformin', 'Glimepiride', 'Insulin', 'Glipizide'],
+    'hypertension': ['Amlodipine', 'Enalapril', 'Atenolol', 'Losartan'],
+    'cold': ['Cetirizine', 'Phenylephrine', 'Paracetamol'],
+    'allergy': ['Cetirizine', 'Loratadine', 'Diphenhydramine'],
+}
+
+
+def rebuild():
+    medicine_search_index.rebuild()
+    condition_medicine_index.refresh()
+
+
+@pytest.fixture
+def catalog():
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Medicine(id=1, name='Crocin 500', generic_name='Paracetamol', brand='Crocin', price=20.0),
+            Medicine(id=2, name='Dolo 650', generic_name='Paracetamol', brand='Dolo', price=30.0),
+            Medicine(id=3, name='Brufen 400', generic_name='Ibuprofen', brand='Brufen', price=25.0),
+            Medicine(id=4, name='Ecosprin', generic_name='Aspirin', price=5.0, prescription_required=False),
+            Medicine(id=5, name='Dabur Honitus', generic_name='Herbal syrup', brand='Honey', price=90.0),
+            Medicine(id=6, name='Paracetamol', generic_name='Paracetamol', price=10.0),
+            Medicine(id=7, name='Okacet', generic_name='Cetirizine Hydrochloride', price=15.0),
+        ])
+        db.session.commit()
+        rebuild()
+        yield db
+        db.session.rollback()
+        db.session.execute(Medicine.__table__.delete())
+        db.session.commit()
+        rebuild()
+
+
+def search(client, **params):
+    response = client.get('/api/search-medicines', query_string=params)
+    assert response.status_code == 200, response.data
+    # Drains the streamed body so its request context closes before the next call
+    response.get_data()
+    return response
+
+
+def test_pinned_condition_medicine_names():
+    names = condition_medicine_names()
+    assert {condition: names[condition] for condition in PINNED_NAMES} == PINNED_NAMES
+
+
+def test_names_resolve_through_name_generic_and_brand(catalog):
+    # Paracetamol matches two generics and one name, Honey only a brand; ids stay in name order
+    assert condition_medicine_index.lookup('fever')[0] == (1, 2, 6, 3, 4)
+    assert condition_medicine_index.lookup('  Cough ')[0] == (5,)
+    assert condition_medicine_index.lookup('fever')[1] == frozenset({1, 2, 3, 4, 6})
+    # Names match whole, not by substring
+    assert condition_medicine_index.lookup('allergy')[0] == ()
+    assert condition_medicine_index.lookup('no such condition') is None
+
+
+def test_first_page_body_matches_medicine_to_dict(catalog):
+    rows = {row['id']: row for row in load_medicine_rows()}
+    _, _, body = condition_medicine_index.lookup('fever')
+    assert json.loads(body) == [medicine_to_dict(rows[i]) for i in (1, 2, 6, 3, 4)]
+
+    client = app.test_client()
+    fast = search(client, condition='fever')
+    assert fast.get_data(as_text=True) == body
+    streamed = search(client, condition='fever', fields=','.join(MEDICINE_FIELDS))
+    assert streamed.get_json() == fast.get_json()
+
+
+def test_first_page_is_capped_at_page_size(catalog, monkeypatch):
+    monkeypatch.setattr(ConditionMedicineIndex, 'PAGE_SIZE', 2)
+    condition_medicine_index.refresh()
+    medicine_ids, _, body = condition_medicine_index.lookup('fever')
+    assert len(medicine_ids) == 5
+    assert [medicine['id'] for medicine in json.loads(body)] == [1, 2]
+
+    response = search(app.test_client(), condition='fever', limit=2)
+    assert response.get_data(as_text=True) == body
+    assert response.headers['X-Next-Cursor']
+
+
+def test_later_condition_pages_follow_the_index_order(catalog):
+    client = app.test_client()
+    first = search(client, condition='fever', limit=3)
+    second = search(client, condition='fever', limit=3, cursor=first.headers['X-Next-Cursor'])
+    assert [m['id'] for m in first.get_json() + second.get_json()] == [1, 2, 6, 3, 4]
+    assert 'X-Next-Cursor' not in second.headers
+
+
+def test_query_is_filtered_to_the_condition_id_set(catalog):
+    client = app.test_client()
+    assert {m['id'] for m in search(client, q='paracetamol', condition='fever').get_json()} == {1, 2, 6}
+    assert [m['id'] for m in search(client, q='brufen', condition='fever').get_json()] == [3]
+    assert search(client, q='brufen', condition='cough').get_json() == []
+    assert {m['id'] for m in search(client, q='paracetamol').get_json()} == {1, 2, 6}
+
+
+def test_catalog_commit_marks_the_index_stale(catalog):
+    assert not condition_medicine_index.stale
+
+    db.session.add(Medicine(id=8, name='Sumo', generic_name='Nimesulide', brand='Acetaminophen', price=12.0))
+    db.session.rollback()
+    assert not condition_medicine_index.stale
+
+    db.session.add(Medicine(id=8, name='Sumo', generic_name='Nimesulide', brand='Acetaminophen', price=12.0))
+    db.session.commit()
+    assert condition_medicine_index.stale
+    # The old entries keep serving until the rebuild
+    assert condition_medicine_index.lookup('fever')[0] == (1, 2, 6, 3, 4)
+
+    condition_medicine_index.refresh()
+    assert not condition_medicine_index.stale
+    assert condition_medicine_index.lookup('fever')[0] == (1, 2, 6, 3, 4, 8)
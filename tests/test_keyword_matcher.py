@@ -0,0 +1,128 @@
+import random
+
+import pytest
+
+from app import KeywordMatcher, analyzer
+
+
+def naive_scan(patterns, text):
+    # The substring loop the automaton replaced
+    hits = {}
+    for pattern, (kind, key, rank) in patterns:
+        if pattern in text:
+            hits.setdefault(kind, set()).add((key, pattern, rank))
+    return hits
+
+
+def matcher_for(patterns):
+    matcher = KeywordMatcher()
+    for pattern, (kind, key, rank) in patterns:
+        matcher.add(pattern, (kind, key, pattern, rank))
+    return matcher
+
+
+def analyzer_keywords():
+    keywords = set(analyzer.emergency_keywords) | set(analyzer.medical_knowledge)
+    for symptom_data in analyzer.medical_knowledge.values():
+        keywords.update(symptom_data.get('red_flags', []))
+    for groups in (analyzer.symptom_variations, analyzer.severity_modifiers, analyzer.duration_patterns):
+        for patterns in groups.values():
+            keywords.update(patterns)
+    return sorted(keywords)
+
+
+def corpus():
+    keywords = analyzer_keywords()
+    rng = random.Random(1)
+    texts = [f'i have {keyword}' for keyword in keywords]
+    texts += [' and '.join(rng.sample(keywords, 4)) for _ in range(300)]
+    texts += [''.join(rng.sample(keywords, 3)) for _ in range(100)]
+    return texts
+
+
+# The helper loops from before the automaton, over the same knowledge
+def naive_symptoms(text):
+    detected = [symptom for symptom in analyzer.medical_knowledge if symptom in text]
+    for main_symptom, variations in analyzer.symptom_variations.items():
+        for variation in variations:
+            if variation in text and main_symptom not in detected:
+                detected.append(main_symptom)
+    return detected
+
+
+def naive_severity(text):
+    scores = {'mild': 0, 'moderate': 0, 'severe': 0, 'critical': 0}
+    for severity, keywords in analyzer.severity_modifiers.items():
+        for keyword in keywords:
+            if keyword in text:
+                scores[severity] += 1
+    top = max(scores, key=scores.get)
+    return top if scores[top] > 0 else 'moderate'
+
+
+def naive_duration(text):
+    for duration_type, patterns in analyzer.duration_patterns.items():
+        for pattern in patterns:
+            if pattern in text:
+                return duration_type
+    return None
+
+
+def naive_red_flags(symptom, text):
+    return [red_flag for red_flag in analyzer.medical_knowledge[symptom].get('red_flags', []) if red_flag in text]
+
+
+@pytest.mark.parametrize('patterns, text', [
+    # Overlapping keywords sharing prefixes and suffixes
+    ([('he', ('k', 'he', 0)), ('she', ('k', 'she', 1)), ('his', ('k', 'his', 2)), ('hers', ('k', 'hers', 3))],
+     'ushers and his shelf'),
+    # A keyword that is a suffix of another
+    ([('back pain', ('k', 'back', 0)), ('pain', ('k', 'pain', 1)), ('ain', ('k', 'ain', 2))],
+     'lower back pain'),
+    # The same pattern under two tags, and a pattern inside another's failure path
+    ([('aab', ('k', 'x', 0)), ('aab', ('j', 'y', 0)), ('ab', ('k', 'ab', 1)), ('b', ('k', 'b', 2))],
+     'aaab'),
+    ([('abc', ('k', 'abc', 0)), ('bcd', ('k', 'bcd', 1)), ('cde', ('k', 'cde', 2))], 'abcde'),
+    ([('pain', ('k', 'pain', 0))], 'no match here'),
+])
+def test_matcher_finds_every_substring_hit(patterns, text):
+    assert matcher_for(patterns).scan(text) == naive_scan(patterns, text)
+
+
+def test_matcher_matches_substring_loop_over_random_patterns():
+    rng = random.Random(7)
+    for _ in range(200):
+        words = {''.join(rng.choice('ab ') for _ in range(rng.randint(1, 5))) for _ in range(8)}
+        patterns = [(word, ('k', word, rank)) for rank, word in enumerate(sorted(words))]
+        text = ''.join(rng.choice('ab ') for _ in range(40))
+        assert matcher_for(patterns).scan(text) == naive_scan(patterns, text)
+
+
+def test_adding_after_compile_recompiles():
+    matcher = matcher_for([('pain', ('k', 'pain', 0))])
+    assert matcher.scan('back pain') == {'k': {('pain', 'pain', 0)}}
+    matcher.add('back', ('k', 'back', 'back', 1))
+    assert matcher.scan('back pain') == {'k': {('pain', 'pain', 0), ('back', 'back', 1)}}
+
+
+def test_analyzer_matches_substring_loops_over_knowledge_keywords():
+    for text in corpus():
+        hits = analyzer.scan(text)
+        assert analyzer.is_emergency(text, hits) == any(keyword in text for keyword in analyzer.emergency_keywords)
+        symptoms = analyzer.extract_symptoms(text, hits)
+        assert symptoms == naive_symptoms(text), text
+        assert analyzer.assess_overall_severity(text, hits) == naive_severity(text), text
+        assert analyzer.extract_duration(text, hits) == naive_duration(text), text
+        for symptom in symptoms:
+            red_flags = analyzer.analyze_primary_symptom(symptom, text, 'moderate', hits)['red_flags']
+            assert red_flags == naive_red_flags(symptom, text), text
+
+
+def test_results_follow_declaration_order_not_text_order():
+    symptoms = list(analyzer.medical_knowledge)[:3]
+    text = ' then '.join(reversed(symptoms))
+    assert analyzer.extract_symptoms(text) == symptoms
+
+    durations = list(analyzer.duration_patterns.items())
+    text = f"{durations[-1][1][0]} and {durations[0][1][-1]}"
+    assert analyzer.extract_duration(text) == durations[0][0]
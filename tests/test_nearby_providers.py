@@ -0,0 +1,62 @@
+import math
+import random
+
+import pytest
+
+from app import ProviderSpatialIndex
+
+
+def make_index(points):
+    index = ProviderSpatialIndex()
+    empty = dict.fromkeys(['phone', 'address', 'city', 'state', 'pincode', 'operating_hours', 'rating'])
+    pharmacies = [{**empty, 'id': i, 'name': f'P{i}', 'is_24_hours': False, 'home_delivery': False,
+                   'latitude': lat, 'longitude': lon}
+                  for i, (lat, lon) in enumerate(points, start=1)]
+    for name, value in index.build([], pharmacies).items():
+        setattr(index, name, value)
+    return index
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * ProviderSpatialIndex.EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def brute_force(points, lat, lon, radius_km, k):
+    matches = sorted((haversine(lat, lon, *point), i) for i, point in enumerate(points, start=1))
+    return [i for distance, i in matches if distance <= radius_km][:k]
+
+
+@pytest.mark.parametrize('lat, lon', [(90.0, 0.0), (-90.0, 45.0), (89.99, 10.0), (-89.5, -170.0)])
+def test_polar_queries_terminate_and_match_brute_force(lat, lon):
+    rng = random.Random(7)
+    points = [(rng.uniform(88.5, 90.0) * math.copysign(1, lat), rng.uniform(-180, 180)) for _ in range(300)]
+    index = make_index(points)
+    for radius_km, k in [(1, 5), (50, 10), (100, None)]:
+        got = [payload['id'] for _, payload in index.nearest(lat, lon, radius_km, k=k)]
+        assert got == brute_force(points, lat, lon, radius_km, k)
+
+
+@pytest.mark.parametrize('lat', [60.0, 80.0, 85.0, 89.0, -88.0])
+def test_high_latitude_queries_match_brute_force(lat):
+    rng = random.Random(int(lat))
+    points = [(max(-90.0, min(90.0, lat + rng.uniform(-1.5, 1.5))), rng.uniform(-20, 20)) for _ in range(500)]
+    index = make_index(points)
+    for _ in range(20):
+        query_lon = rng.uniform(-5, 5)
+        radius_km, k = rng.choice([5, 20, 100]), rng.choice([1, 5, None])
+        got = [payload['id'] for _, payload in index.nearest(lat, query_lon, radius_km, k=k)]
+        assert got == brute_force(points, lat, query_lon, radius_km, k)
+
+
+def test_queries_wrap_around_the_antimeridian():
+    # Enough occupied cells elsewhere that the query walks rings rather than scanning its band
+    points = [(10.0, 179.99), (10.0, -179.99), (10.0, 179.0)] + [(50.0, i / 10) for i in range(500)]
+    index = make_index(points)
+    got = [payload['id'] for _, payload in index.nearest(10.0, -179.995, 10)]
+    assert got == [2, 1]
+
+
+def test_empty_index_returns_nothing():
+    assert make_index([]).nearest(90.0, 0.0, 100) == []
@@ -0,0 +1,133 @@
+import base64
+import json
+import random
+
+import pytest
+
+import app as app_module
+from app import (DOCTOR_FIELDS, DOCTOR_ORDER, Doctor, Medicine, app, db, decode_cursor, encode_cursor,
+                 keyset_page, lexicographic_after, offset_from_cursor)
+
+
+def raw_cursor(payload, pad=False):
+    encoded = base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+    return encoded if pad else encoded.rstrip('=')
+
+
+@pytest.fixture
+def catalog():
+    rng = random.Random(23)
+    with app.app_context():
+        db.create_all()
+        # Few distinct sort keys, so most pages end and start inside a run of ties
+        db.session.add_all(Doctor(first_name='Dr', last_name=str(i), specialty=rng.choice(['Cardiology', 'ENT']),
+                                  license_number=f'L{i}', rating=rng.choice([0.0, 3.5, 4.5]))
+                           for i in range(61))
+        db.session.add_all(Medicine(name=rng.choice(['Crocin', 'Dolo', 'Pan']), generic_name='X', price=1.0)
+                           for _ in range(47))
+        db.session.commit()
+        yield db
+        db.session.execute(Doctor.__table__.delete())
+        db.session.execute(Medicine.__table__.delete())
+        db.session.commit()
+
+
+def walk(client, url):
+    items, cursor, pages = [], None, 0
+    while True:
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200, response.data
+        items += response.get_json()
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return items, pages
+
+
+def walk_keyset(order, limit=6):
+    ids, cursor = [], None
+    while True:
+        rows, cursor = keyset_page(Doctor, {'id': ('id',)}, order, [], cursor, limit)
+        ids += [row.id for row in rows]
+        if not cursor:
+            return ids
+
+
+def test_cursor_round_trips_without_padding():
+    for values in ([1], [4.5, 12], ['Crocin', 7], ['é', 3]):
+        cursor = encode_cursor('doctor:rating,id', values)
+        assert '=' not in cursor
+        assert decode_cursor(cursor, 'doctor:rating,id', len(values)) == values
+    assert decode_cursor(raw_cursor(['offset', [40]], pad=True), 'offset', 1) == [40]
+
+
+@pytest.mark.parametrize('cursor', [
+    'garbage!',
+    raw_cursor(['medicine:name,id', ['Crocin', 1]]),
+    raw_cursor(['doctor:rating,id', [4.5]]),
+    raw_cursor(['doctor:rating,id', 4.5]),
+    raw_cursor(['doctor:rating,id', [True, 1]]),
+    raw_cursor(['doctor:rating,id', [None, 1]]),
+    raw_cursor(['doctor:rating,id', [{'a': 1}, 1]]),
+    raw_cursor(['doctor:rating,id', [[4.5], 1]]),
+    base64.urlsafe_b64encode(b'["doctor:rating,id",[NaN,1]]').decode('ascii'),
+    base64.urlsafe_b64encode(b'["doctor:rating,id",[Infinity,1]]').decode('ascii'),
+])
+def test_decode_rejects_forged_keyset_cursors(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(cursor, 'doctor:rating,id', 2)
+
+
+@pytest.mark.parametrize('offset', [-1, 1.5, True, 'x', None])
+def test_offset_cursor_must_be_a_non_negative_int(offset):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        offset_from_cursor(raw_cursor(['offset', [offset]]))
+    assert offset_from_cursor(None) == 0
+
+
+def test_doctors_page_to_the_end_with_ties_broken_by_id(catalog):
+    expected = [d.id for d in sorted(Doctor.query, key=lambda d: (-d.rating, -d.id))]
+    doctors, pages = walk(app.test_client(), '/api/search-doctors?limit=7')
+    assert [d['id'] for d in doctors] == expected
+    assert pages == 9
+
+
+def test_medicines_page_to_the_end_without_gaps_or_repeats(catalog):
+    expected = [(m.name, m.id) for m in Medicine.query.order_by(Medicine.name, Medicine.id)]
+    medicines, _ = walk(app.test_client(), '/api/search-medicines?limit=5&fields=id,name')
+    assert [(m['name'], m['id']) for m in medicines] == expected
+
+
+def test_row_value_and_lexicographic_predicates_agree(catalog, monkeypatch):
+    row_value = walk_keyset(DOCTOR_ORDER)
+    monkeypatch.setattr(app_module, 'keyset_after', lexicographic_after)
+    assert walk_keyset(DOCTOR_ORDER) == row_value
+    assert len(set(row_value)) == Doctor.query.count()
+
+
+def test_mixed_directions_use_the_lexicographic_predicate(catalog):
+    expected = [d.id for d in sorted(Doctor.query, key=lambda d: (-d.rating, d.id))]
+    assert walk_keyset((('rating', True), ('id', False))) == expected
+
+
+def test_fields_projects_and_joins_name(catalog):
+    client = app.test_client()
+    response = client.get('/api/search-doctors?limit=2&fields=id,name')
+    assert all(set(doctor) == {'id', 'name'} for doctor in response.get_json())
+    assert response.get_json()[0]['name'].startswith('Dr ')
+    assert set(client.get('/api/search-doctors?limit=1').get_json()[0]) == set(DOCTOR_FIELDS)
+
+
+@pytest.mark.parametrize('url', [
+    '/api/search-doctors?fields=id,bogus',
+    '/api/search-medicines?fields=id,bogus',
+    '/api/search-doctors?cursor=' + raw_cursor(['doctor:rating,id', [True, 1]]),
+    '/api/search-medicines?cursor=' + raw_cursor(['offset', [3]]),
+    '/api/search-medicines?q=crocin&cursor=' + raw_cursor(['offset', [-3]]),
+    '/doctors?cursor=garbage',
+    '/medicines?cursor=' + raw_cursor(['doctor:rating,id', [4.5, 1]]),
+])
+def test_bad_fields_and_cursors_return_400(catalog, url):
+    response = app.test_client().get(url)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
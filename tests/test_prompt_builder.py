@@ -0,0 +1,38 @@
+import sys
+import types
+
+from app import PromptBuilder, app
+
+
+def test_construction_does_not_resolve_the_tokenizer(monkeypatch):
+    calls = []
+    monkeypatch.setattr('app.default_tokenizer', lambda: calls.append(1) or str.split)
+    builder = PromptBuilder('You are a helpful assistant.')
+    assert calls == []
+
+    builder.build('fever')
+    builder.build('cough')
+    assert calls == [1]
+
+
+def test_tiktoken_failure_falls_back_without_a_traceback(monkeypatch, caplog):
+    def offline(model):
+        raise ConnectionError('cannot download cl100k_base')
+
+    monkeypatch.setitem(sys.modules, 'tiktoken', types.SimpleNamespace(encoding_for_model=offline))
+    monkeypatch.setitem(app.config, 'CHAT_TOKENIZER', 'tiktoken')
+    builder = PromptBuilder('You are a helpful assistant.')
+
+    assert builder.tokenizer is None
+    messages, usage = builder.build('I have a headache')
+    assert messages[-1] == {'role': 'user', 'content': 'I have a headache'}
+    assert usage['system_tokens'] > 0
+    warnings = [record for record in caplog.records if 'heuristic tokenizer' in record.getMessage()]
+    assert len(warnings) == 1 and warnings[0].exc_info is None
+
+
+def test_heuristic_tokenizer_never_imports_tiktoken(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'tiktoken', None)
+    monkeypatch.setitem(app.config, 'CHAT_TOKENIZER', 'heuristic')
+    builder = PromptBuilder('System prompt')
+    assert builder.count_tokens('fever and cough') == 3 + PromptBuilder.MESSAGE_OVERHEAD
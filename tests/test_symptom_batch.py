@@ -0,0 +1,70 @@
+import pytest
+
+from app import Consultation, User, analyzer, app, db
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.session.execute(Consultation.__table__.delete())
+        db.session.execute(User.__table__.delete())
+        db.session.commit()
+
+
+def test_batch_matches_single_analysis_in_request_order(client):
+    items = [{'symptoms': 'Severe headache since yesterday', 'age': 30},
+             {'symptoms': '  mild cough and cold  ', 'gender': 'female'},
+             {'symptoms': 'Severe headache since yesterday', 'age': 30}]
+    response = client.post('/api/analyze-symptoms/batch', json={'items': items})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['count'] == 3
+    expected = [analyzer.analyze_symptoms(item['symptoms'].strip(), item.get('age'), item.get('gender'))
+                for item in items]
+    assert [result['condition'] for result in body['results']] == [result['condition'] for result in expected]
+    assert body['results'][0] == body['results'][2]
+
+
+@pytest.mark.parametrize('payload', [
+    None,
+    ['fever'],
+    {},
+    {'symptoms': ['fever']},
+    {'items': []},
+    {'items': 'fever'},
+    {'items': ['fever']},
+    {'items': [{'symptoms': 123}]},
+    {'items': [{'symptoms': ['fever']}]},
+    {'items': [{'symptoms': {'text': 'fever'}}]},
+    {'items': [{'symptoms': '   '}]},
+    {'items': [{'symptoms': 'fever'}, {'age': 40}]},
+])
+def test_malformed_items_return_400(client, payload):
+    response = client.post('/api/analyze-symptoms/batch', json=payload)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_batch_limit(client, monkeypatch):
+    monkeypatch.setitem(app.config, 'ANALYSIS_BATCH_LIMIT', 2)
+    response = client.post('/api/analyze-symptoms/batch', json={'items': [{'symptoms': 'fever'}] * 3})
+    assert response.status_code == 400
+
+
+def test_logged_in_batch_saves_stripped_symptoms(client):
+    user = User(email='batch@example.com', password_hash='x', first_name='A', last_name='B')
+    db.session.add(user)
+    db.session.commit()
+    with client.session_transaction() as flask_session:
+        flask_session['user_id'] = user.id
+
+    response = client.post('/api/analyze-symptoms/batch',
+                           json={'items': [{'symptoms': ' fever '}, {'symptoms': 'back pain'}]})
+
+    assert response.status_code == 200
+    saved = Consultation.query.filter_by(user_id=user.id).order_by(Consultation.id).all()
+    assert [c.symptoms for c in saved] == ['fever', 'back pain']
+    assert [c.diagnosis for c in saved] == [r['condition'] for r in response.get_json()['results']]